@@ -1,69 +1,214 @@
 
 import os
 from message import Message
+from llm_cache import LLMCache
+from conversation_history import ConversationHistory
+from llm_scheduler import INTERACTIVE, estimate_tokens, get_scheduler
 import ollama
-from groq import Groq
+from groq import Groq, AsyncGroq
 import openai
 from dotenv import load_dotenv
-from typing import Union, List
+from typing import Iterator, Union, List
 
 
 load_dotenv()
 
 class Agent:
-    def __init__(self, backend="groq", model_name="llama3-8b-8192", cache = None):
+    def __init__(self, backend="groq", model_name="llama3-8b-8192", cache = None, priority=INTERACTIVE):
         self.model_name = model_name
-        self.cache = cache
+        # Lane of the shared rate-limit scheduler (INTERACTIVE or BATCH)
+        self.priority = priority
+        self.scheduler = get_scheduler()
+        # Pass an LLMCache instance, or True to use the default on-disk cache
+        self.cache = LLMCache() if cache is True else cache
         self.backend = backend
         self.token_limit = 7500
-        self.conversation_history = []
+        # Keeps the prompt within token_limit by folding old turns into a memory message
+        self.history = ConversationHistory(token_limit=self.token_limit)
         self.role = "user"
 
         if backend == "groq":
             self.groq_client = Groq(api_key=os.getenv("GROQ_API_TOKEN"))
+            self.async_groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_TOKEN"))
         elif backend == "openai":
             openai.api_key = os.environ["OPENAI_API_KEY"]
             self.openai_client = openai.OpenAI()
+            self.async_openai_client = openai.AsyncOpenAI()
         elif backend == "ollama":
-            pass
+            self.async_ollama_client = ollama.AsyncClient()
         else:
             raise ValueError("Please provide a valid inference")
 
     def __str__(self) -> str:
         return f"Agent(model_name={self.model_name})"
 
+    def _build_request(self, prompt, system_message):
+        """Messages and request parameters for the configured backend"""
+        if self.backend == "ollama":
+            messages = [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ]
+            params = {"model": self.model_name}  # "llama3:8b"
+        elif self.backend == "groq":
+            messages = prompt
+            params = {
+                "model": self.model_name,#"llama3-70b-8192",
+                "temperature": 0,
+                "response_format": {"type": "json_object"},
+            }
+        elif self.backend == "openai":
+            messages = prompt
+            params = {
+                "model": "gpt-4o",
+                "response_format": {"type": "json_object"},
+            }
+        else:
+            raise ValueError("Please provide a valid inference: 'ollama' or 'groq'")
+        return messages, params
+
+    def _cache_key(self, messages, params):
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            self.backend,
+            params["model"],
+            messages,
+            temperature=params.get("temperature"),
+            response_format=params.get("response_format"),
+        )
+
     def get_completion(self, prompt, system_message="You are a helpful assistant."):
 
         print(prompt)
+        messages, params = self._build_request(prompt, system_message)
+
+        def compute():
+            return self.scheduler.call(
+                self.backend,
+                params["model"],
+                lambda: self._request_completion(messages, **params),
+                tokens=estimate_tokens(messages),
+                priority=self.priority,
+            )
+
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(self._cache_key(messages, params), compute)
+
+    async def aget_completion(self, prompt, system_message="You are a helpful assistant."):
+        """Async counterpart of get_completion"""
+        messages, params = self._build_request(prompt, system_message)
+
+        def compute():
+            return self.scheduler.acall(
+                self.backend,
+                params["model"],
+                lambda: self._arequest_completion(messages, **params),
+                tokens=estimate_tokens(messages),
+                priority=self.priority,
+            )
+
+        if self.cache is None:
+            return await compute()
+        return await self.cache.aget_or_compute(self._cache_key(messages, params), compute)
+
+    async def _arequest_completion(self, messages, **params):
+        """Send a completion request to the configured backend without blocking the event loop"""
+        if self.backend == "ollama":
+            response = await self.async_ollama_client.chat(messages=messages, **params)
+            return response["message"]["content"]
+        elif self.backend == "groq":
+            chat_completion = await self.async_groq_client.chat.completions.create(
+                messages=messages, **params
+            )
+            return chat_completion.choices[0].message.content
+        elif self.backend == "openai":
+            completion = await self.async_openai_client.chat.completions.create(
+                messages=messages, **params
+            )
+            return completion.choices[0].message.content
+        else:
+            raise ValueError("Please provide a valid inference: 'ollama' or 'groq'")
+
+    def stream_completion(self, prompt, system_message="You are a helpful assistant.") -> Iterator[str]:
+        """Like get_completion, but yields the response in chunks as they arrive"""
+        messages, params = self._build_request(prompt, system_message)
+
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        for chunk in self._stream_request(messages, **params):
+            chunks.append(chunk)
+            yield chunk
+
+        if cache_key is not None:
+            # LLMCache.set skips empty responses, like get_or_compute
+            self.cache.set(cache_key, "".join(chunks))
+
+    def _stream_request(self, messages, **params) -> Iterator[str]:
+        """Send a streaming completion request and yield the content deltas"""
         if self.backend == "ollama":
-            response = ollama.chat(
-                model=self.model_name,#"llama3:8b",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt},
-                ],
+            stream = self.scheduler.call(
+                self.backend,
+                params["model"],
+                lambda: ollama.chat(messages=messages, stream=True, **params),
+                tokens=estimate_tokens(messages),
+                priority=self.priority,
             )
+            for chunk in stream:
+                content = chunk["message"]["content"]
+                if content:
+                    yield content
+        elif self.backend in ("groq", "openai"):
+            client = self.groq_client if self.backend == "groq" else self.openai_client
+            stream = self.scheduler.call(
+                self.backend,
+                params["model"],
+                lambda: client.chat.completions.create(messages=messages, stream=True, **params),
+                tokens=estimate_tokens(messages),
+                priority=self.priority,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        else:
+            raise ValueError("Please provide a valid inference: 'ollama' or 'groq'")
+
+    def _request_completion(self, messages, **params):
+        """Send a completion request to the configured backend"""
+        if self.backend == "ollama":
+            response = ollama.chat(messages=messages, **params)
             return response["message"]["content"]
         elif self.backend == "groq":
             chat_completion = self.groq_client.chat.completions.create(
-                model=self.model_name,#"llama3-70b-8192",
-                temperature=0,
-                messages=prompt,
-                response_format={"type": "json_object"}
+                messages=messages, **params
             )
             return chat_completion.choices[0].message.content
         elif self.backend == "openai":
             completion = self.openai_client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=prompt,
-                        response_format={ "type": "json_object" }
+                messages=messages, **params
             )
             return completion.choices[0].message.content
         else:
             raise ValueError("Please provide a valid inference: 'ollama' or 'groq'")
 
+    @property
+    def conversation_history(self):
+        return self.history.messages()
+
+    @property
+    def last_prompt_tokens(self) -> int:
+        """Token count of the prompt sent by the last generate call"""
+        return self.history.last_prompt_tokens
+
     def add_system_message(self, message):
-        self.conversation_history.append({"role": message.role, "content": message.content})
+        self.history.add(message.role, message.content)
     
     def _generate(
         self, message: Union[Message, List[Message]]
@@ -72,34 +217,53 @@ class Agent:
         # Add user message(s) to history
         if isinstance(message, list):
             for m in message:
-                self.conversation_history.append({
-                    "role": m.role,
-                    "content": m.content
-                })
+                self.history.add(m.role, m.content)
         elif message is None:
             pass
         else:
-            self.conversation_history.append({
-                "role": message.role,
-                "content": message.content
-            })
+            self.history.add(message.role, message.content)
 
         # Get response from API
-        print(self.conversation_history)
-        response = self.get_completion(self.conversation_history)
+        prompt = self.history.build_prompt()
+        print(f"Prompt: {len(prompt)} messages, {self.history.last_prompt_tokens} tokens")
+        response = self.get_completion(prompt)
         message = Message(self.role, response)
         
         # Add assistant response to history
-        self.conversation_history.append({
-            "role": self.role,
-            "content": response
-        })
+        self.history.add(self.role, response)
 
         return message
 
 
+    def generate_stream(self, message: Message) -> Iterator[str]:
+        """Streaming variant of generate; the full response is added to history at the end"""
+        if message is not None:
+            for m in message if isinstance(message, list) else [message]:
+                self.history.add(m.role, m.content)
+
+        prompt = self.history.build_prompt()
+        chunks = []
+        for chunk in self.stream_completion(prompt):
+            chunks.append(chunk)
+            yield chunk
+
+        self.history.add(self.role, "".join(chunks))
+
     def generate(self, message: Message) -> Message:
 
         response = self._generate(message)
 
         return response
+
+    async def agenerate(self, message: Union[Message, List[Message]]) -> Message:
+        """Async counterpart of generate"""
+        if message is not None:
+            for m in message if isinstance(message, list) else [message]:
+                self.history.add(m.role, m.content)
+
+        prompt = self.history.build_prompt()
+        print(f"Prompt: {len(prompt)} messages, {self.history.last_prompt_tokens} tokens")
+        response = await self.aget_completion(prompt)
+
+        self.history.add(self.role, response)
+        return Message(self.role, response)
@@ -0,0 +1,68 @@
+"""
+Compare the PDF extraction backends on sample CVs and transcripts.
+
+Usage:
+    python benchmarks/pdf_extraction.py [PDF ...] [--repeat N]
+
+Without arguments every PDF under student_data/ is used. Extraction runs with
+the text cache disabled so each backend does the full work on every repeat;
+the last column shows the time of a warm content-hash cache hit.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_extraction import PDFTextExtractor, available_backends
+
+
+def time_call(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parallel-threshold", type=int, default=16)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(Path("student_data").rglob("*.pdf"))
+    if not pdfs:
+        parser.error("no PDFs given and none found under student_data/")
+
+    backends = available_backends()
+    print(f"Backends: {', '.join(backends)}  (median of {args.repeat} runs)\n")
+    print(f"{'file':40} {'backend':10} {'pages':>5} {'chars':>8} {'serial s':>9} {'parallel s':>10} {'cached s':>9}")
+
+    for pdf in pdfs:
+        for backend in backends:
+            serial = PDFTextExtractor(backend, cache_dir=None, parallel_threshold=10 ** 9)
+            parallel = PDFTextExtractor(backend, cache_dir=None, parallel_threshold=args.parallel_threshold)
+            pages = serial.extract_pages(pdf)
+            chars = sum(len(page) for page in pages)
+
+            serial_time = time_call(lambda: serial.extract_text(pdf), args.repeat)
+            parallel_time = time_call(lambda: parallel.extract_text(pdf), args.repeat)
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cached = PDFTextExtractor(backend, cache_dir=cache_dir)
+                cached.extract_text(pdf)
+                cached_time = time_call(lambda: cached.extract_text(pdf), args.repeat)
+
+            print(
+                f"{pdf.name[:40]:40} {backend:10} {len(pages):>5} {chars:>8} "
+                f"{serial_time:>9.3f} {parallel_time:>10.3f} {cached_time:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
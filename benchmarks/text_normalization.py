@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of the extracted-text normalizer on a synthetic 50-page transcript.
+
+Usage:
+    python benchmarks/text_normalization.py [--pages 50] [--repeat 20]
+
+Compares the previous string-concatenation implementation of
+StudentAgent.clean_extracted_text with the streaming normalize_pages
+generator, both on the joined document and page by page.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text_normalization import normalize_pages
+
+
+COURSES = [
+    "Introduction to Informatics", "Discrete Structures", "Linear Algebra",
+    "Analysis for Informatics", "Fundamentals of Algorithms and Data Structures",
+    "Introduction to Deep Learning", "Computer Vision", "Databases",
+    "Operating Systems", "Numerical Programming", "Machine Learning",
+]
+
+
+def legacy_clean_extracted_text(text: str) -> str:
+    """The implementation clean_extracted_text had before the streaming rewrite"""
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    cleaned_text = ""
+    buffer = []
+    for line in lines:
+        if line.endswith(('.', '?', '!')):
+            buffer.append(line)
+            cleaned_text += ' '.join(buffer) + '\n\n'
+            buffer = []
+        elif len(line.split()) <= 2:
+            buffer.append(line)
+        else:
+            buffer.append(line)
+            cleaned_text += ' '.join(buffer) + '\n\n'
+            buffer = []
+    if buffer:
+        cleaned_text += ' '.join(buffer)
+    cleaned_text = ' '.join(cleaned_text.split())
+    cleaned_text = cleaned_text.replace('. ', '.\n\n')
+    return cleaned_text
+
+
+def synthetic_transcript(pages: int, rows_per_page: int = 45) -> list:
+    rng = random.Random(0)
+    result = []
+    for page in range(pages):
+        lines = [f"Transcript of Records   Page {page + 1} of {pages}", ""]
+        for _ in range(rows_per_page):
+            course = rng.choice(COURSES)
+            lines.append(f"IN{rng.randint(1000, 9999)}  {course}   {rng.choice([5, 6, 8])} ECTS   {rng.choice(['1.0', '1.3', '1.7', '2.0', '2.3'])}")
+        lines.append("The grades above are final. Module descriptions are avail-")
+        lines.append("able in the module handbook.")
+        result.append("\n".join(lines))
+    return result
+
+
+def time_call(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = synthetic_transcript(args.pages)
+    text = "\n".join(pages)
+    print(f"{args.pages} pages, {len(text)} chars (median of {args.repeat} runs)\n")
+
+    legacy = time_call(lambda: legacy_clean_extracted_text(text), args.repeat)
+    joined = time_call(lambda: "".join(normalize_pages([text])), args.repeat)
+    streamed = time_call(lambda: "".join(normalize_pages(iter(pages))), args.repeat)
+
+    print(f"{'legacy clean_extracted_text':32} {legacy * 1000:8.2f} ms")
+    print(f"{'normalize_pages (joined text)':32} {joined * 1000:8.2f} ms  {legacy / joined:5.2f}x")
+    print(f"{'normalize_pages (page iterator)':32} {streamed * 1000:8.2f} ms  {legacy / streamed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
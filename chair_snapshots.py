@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+def chair_slug(chair_name: str) -> str:
+    return chair_name.lower().replace(' ', '_')
+
+
+def _temp_path(path: Path) -> Path:
+    """Hidden sibling of path, unique to this process and thread, for atomic replace"""
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+@dataclass
+class ChairSnapshot:
+    chair: str
+    url: str
+    sha256: str
+    scraped_at: float
+    path: Path
+
+    def read(self) -> str:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+class ChairSnapshotStore:
+    """
+    Content-addressed store of chair scrapes shared by all students.
+
+    Layout under root (thesis_data by default):
+    - snapshots/<sha256>.txt: immutable scrape results, one file per distinct content
+    - snapshots/index.json: latest snapshot per chair (sha256, url, scraped_at)
+    - <student_id>/opp_<chair>.txt: per-student reference, a hard link to the
+      snapshot (a copy where hard links are not supported), replaced on every
+      link so repeat scrapes never accumulate duplicate opportunity blocks
+
+    A chair scraped less than ttl seconds ago is fresh and is reused instead
+    of being scraped again; identical scrapes share one snapshot file.
+    Callers validate a scrape before put(), since it is served to every
+    student until it expires, and prune() after it.
+    """
+
+    def __init__(self, root: Union[str, Path] = "thesis_data", ttl: float = 24 * 3600):
+        self.root = Path(root)
+        self.snapshot_dir = self.root / "snapshots"
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.snapshot_dir / "index.json"
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._chair_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def chair_lock(self, chair_name: str) -> threading.Lock:
+        """Held while checking freshness and scraping, so concurrent students share one scrape"""
+        with self._lock:
+            return self._chair_locks[chair_slug(chair_name)]
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict]) -> None:
+        tmp_path = _temp_path(self.index_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        tmp_path.replace(self.index_path)
+
+    def latest(self, chair_name: str) -> Optional[ChairSnapshot]:
+        """Most recent snapshot of a chair, fresh or not"""
+        slug = chair_slug(chair_name)
+        with self._lock:
+            entry = self._read_index().get(slug)
+        if entry is None:
+            return None
+        path = self.snapshot_dir / f"{entry['sha256']}.txt"
+        if not path.exists():
+            return None
+        return ChairSnapshot(chair=slug, url=entry["url"], sha256=entry["sha256"],
+                             scraped_at=entry["scraped_at"], path=path)
+
+    def fresh(self, chair_name: str) -> Optional[ChairSnapshot]:
+        """Latest snapshot of a chair if it is younger than ttl"""
+        snapshot = self.latest(chair_name)
+        if snapshot is None or time.time() - snapshot.scraped_at > self.ttl:
+            return None
+        return snapshot
+
+    def put(self, chair_name: str, url: str, content: str) -> ChairSnapshot:
+        """Store a scrape result and make it the chair's latest snapshot"""
+        slug = chair_slug(chair_name)
+        data = content.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.snapshot_dir / f"{sha256}.txt"
+        if not path.exists():
+            tmp_path = _temp_path(path)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            tmp_path.replace(path)
+
+        scraped_at = time.time()
+        with self._lock:
+            index = self._read_index()
+            index[slug] = {"sha256": sha256, "url": url, "scraped_at": scraped_at}
+            self._write_index(index)
+        return ChairSnapshot(chair=slug, url=url, sha256=sha256, scraped_at=scraped_at, path=path)
+
+    def link(self, student_id: str, snapshot: ChairSnapshot) -> Path:
+        """Point the student's reference for the snapshot's chair at the snapshot"""
+        student_dir = self.root / student_id
+        student_dir.mkdir(parents=True, exist_ok=True)
+        ref_path = student_dir / f"opp_{snapshot.chair}.txt"
+        if ref_path.exists() and os.path.samefile(ref_path, snapshot.path):
+            # Already linked; renaming a hard link onto itself would be a no-op
+            return ref_path
+        tmp_path = _temp_path(ref_path)
+        try:
+            os.link(snapshot.path, tmp_path)
+        except OSError:
+            shutil.copyfile(snapshot.path, tmp_path)
+        tmp_path.replace(ref_path)
+        return ref_path
+
+    def prune(self) -> int:
+        """
+        Delete snapshots that are no chair's latest and that no student links to
+        any more (hard link count 1). Returns the number of files removed.
+        """
+        with self._lock:
+            current = {entry["sha256"] for entry in self._read_index().values()}
+            removed = 0
+            for path in self.snapshot_dir.glob("*.txt"):
+                if path.stem not in current and path.stat().st_nlink == 1:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+
+_default_store: Optional[ChairSnapshotStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> ChairSnapshotStore:
+    """Return the process-wide snapshot store, so per-chair locks are shared by all sessions"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ChairSnapshotStore()
+        return _default_store
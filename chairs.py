@@ -0,0 +1,24 @@
+import json
+import random
+from typing import Dict, List, Optional, Sequence
+
+
+# Chairs scraped by default; pass chair_names=None to sweep every chair in chairs_data.json
+DEFAULT_CHAIRS = ('Quantum Computing', 'Theoretical Foundations of Artificial Intelligence', 'Information Systems and Business Process Management')
+
+
+def load_chairs_data(chair_names: Optional[Sequence[str]] = DEFAULT_CHAIRS, path: str = 'chairs_data.json') -> Dict[str, Dict]:
+    """Chairs from chairs_data.json ({name: {"professor", "link", ...}}), optionally filtered by name"""
+    with open(path, 'r') as f:
+        chairs_dict = json.load(f)
+    return {
+        k: v for k, v in chairs_dict.items()
+        if chair_names is None or k in chair_names
+    }
+
+
+def sample_chairs(chair_names: Sequence[str], num_chairs: Optional[int] = None) -> List[str]:
+    """num_chairs randomly chosen names of chair_names, or all of them if num_chairs is None"""
+    if num_chairs is None or num_chairs >= len(chair_names):
+        return list(chair_names)
+    return random.sample(list(chair_names), num_chairs)
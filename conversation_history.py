@@ -0,0 +1,109 @@
+from typing import Callable, Dict, List, Optional
+
+from tokens import count_tokens
+
+
+# Tokens added per message by the chat format (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def compact_summary(messages: List[Dict[str, str]], previous: str = "", max_chars_per_message: int = 300) -> str:
+    """Default summarizer: keep the start of each evicted message, one line per turn"""
+    lines = [previous] if previous else []
+    for message in messages:
+        content = " ".join(message["content"].split())
+        if len(content) > max_chars_per_message:
+            content = content[:max_chars_per_message].rstrip() + " ..."
+        lines.append(f"- {message['role']}: {content}")
+    return "\n".join(lines)
+
+
+class ConversationHistory:
+    """
+    Conversation history kept within a token budget.
+
+    System messages are pinned. When the prompt would exceed token_limit, the
+    oldest turns are evicted and folded into a single memory message via
+    summarizer(evicted_messages, previous_memory). The memory itself is capped
+    at memory_token_limit by dropping its oldest lines.
+    """
+
+    def __init__(
+        self,
+        token_limit: int = 7500,
+        model: str = "gpt-4o",
+        summarizer: Optional[Callable[[List[Dict[str, str]], str], str]] = None,
+        memory_token_limit: Optional[int] = None,
+    ):
+        self.token_limit = token_limit
+        self.model = model
+        self.summarizer = summarizer or compact_summary
+        self.memory_token_limit = memory_token_limit or token_limit // 4
+        self.system_messages: List[Dict[str, str]] = []
+        self.turns: List[Dict[str, str]] = []
+        self.memory = ""
+        self._token_counts: Dict[int, int] = {}
+        self.last_prompt_tokens = 0
+
+    def _tokens(self, message: Dict[str, str]) -> int:
+        # Messages are immutable once added, so counts are cached by identity
+        key = id(message)
+        if key not in self._token_counts:
+            self._token_counts[key] = count_tokens(message["content"], self.model) + MESSAGE_OVERHEAD_TOKENS
+        return self._token_counts[key]
+
+    def add(self, role: str, content: str) -> None:
+        message = {"role": role, "content": content}
+        if role == "system":
+            self.system_messages.append(message)
+        else:
+            self.turns.append(message)
+
+    def _memory_message(self) -> Optional[Dict[str, str]]:
+        if not self.memory:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{self.memory}"}
+
+    def _trim_memory(self) -> None:
+        lines = self.memory.split("\n")
+        while len(lines) > 1 and count_tokens("\n".join(lines), self.model) > self.memory_token_limit:
+            lines.pop(0)
+        self.memory = "\n".join(lines)
+
+    def prompt_tokens(self) -> int:
+        memory = self._memory_message()
+        total = sum(self._tokens(m) for m in self.system_messages + self.turns)
+        if memory:
+            total += count_tokens(memory["content"], self.model) + MESSAGE_OVERHEAD_TOKENS
+        return total
+
+    def build_prompt(self) -> List[Dict[str, str]]:
+        """Messages to send: pinned system messages, memory, then the most recent turns"""
+        # Always keep the latest turn, even if it alone exceeds the budget
+        while len(self.turns) > 1 and self.prompt_tokens() > self.token_limit:
+            evicted = []
+            while len(self.turns) > 1 and self.prompt_tokens() > self.token_limit:
+                message = self.turns.pop(0)
+                self._token_counts.pop(id(message), None)
+                evicted.append(message)
+            # Folding grows the memory, so the outer loop checks the budget again
+            self._fold(evicted)
+
+        memory = self._memory_message()
+        prompt = list(self.system_messages) + ([memory] if memory else []) + list(self.turns)
+        self.last_prompt_tokens = self.prompt_tokens()
+        return prompt
+
+    def _fold(self, evicted: List[Dict[str, str]]) -> None:
+        self.memory = self.summarizer(evicted, self.memory)
+        self._trim_memory()
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Full retained history (without the memory message)"""
+        return list(self.system_messages) + list(self.turns)
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self.memory = ""
+        self._token_counts.clear()
+        self.last_prompt_tokens = 0
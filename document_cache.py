@@ -0,0 +1,65 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from llm_cache import LLMCache
+
+
+def document_sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class DocumentCache(LLMCache):
+    """
+    Cache of per-document LLM results (CV summaries, transcript analyses).
+
+    Entries are keyed by task, prompt version and the SHA-256 of the uploaded
+    bytes, so a re-uploaded document is served without calling the model.
+    Bumping a task's prompt version makes its old entries unreachable, and
+    invalidate_stale() deletes them. TTL and LRU eviction come from LLMCache.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "cache/document_cache.sqlite",
+        ttl: Optional[float] = 30 * 24 * 3600,
+        max_bytes: int = 20 * 1024 * 1024,
+    ):
+        super().__init__(path=path, ttl=ttl, max_bytes=max_bytes)
+
+    @staticmethod
+    def document_key(task: str, prompt_version: str, content_hash: str) -> str:
+        return f"{task}:{prompt_version}:{content_hash}"
+
+    def get_result(self, task: str, prompt_version: str, content_hash: str) -> Optional[Any]:
+        """Return the stored result of task for the document, or None on a miss"""
+        value = self.get(self.document_key(task, prompt_version, content_hash))
+        return json.loads(value) if value is not None else None
+
+    def set_result(self, task: str, prompt_version: str, content_hash: str, result: Any) -> None:
+        self.set(self.document_key(task, prompt_version, content_hash), json.dumps(result))
+
+    def invalidate(self, task: str, prompt_version: Optional[str] = None) -> int:
+        """Delete the entries of task (of one prompt version, or all); returns the count"""
+        prefix = f"{task}:{prompt_version}:" if prompt_version is not None else f"{task}:"
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def invalidate_stale(self, current_versions: Dict[str, str]) -> int:
+        """Delete entries whose prompt version differs from current_versions[task]"""
+        deleted = 0
+        with self._lock:
+            for task, version in current_versions.items():
+                prefix = f"{task}:"
+                current = f"{task}:{version}:"
+                deleted += self._conn.execute(
+                    "DELETE FROM entries WHERE substr(key, 1, ?) = ? AND substr(key, 1, ?) != ?",
+                    (len(prefix), prefix, len(current), current),
+                ).rowcount
+            self._conn.commit()
+        return deleted
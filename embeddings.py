@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from openai import OpenAI
+from llm_scheduler import BATCH, get_scheduler
+from profile_store import StudentProfile
+from tokens import count_tokens
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value if v)
+    return str(value)
+
+
+def student_profile_text(student: StudentProfile) -> str:
+    """Text used to embed a student (interests, preferred topics, skills, CV summary)"""
+    return "\n".join([
+        f"Interests: {_as_text(student.interests)}",
+        f"Preferred Topics: {_as_text(student.preferred_topics)}",
+        f"Skills: {_as_text(student.skills)}",
+        f"CV Summary: {_as_text(student.cv_summary)}",
+    ])
+
+
+def project_text(project: Dict) -> str:
+    """Text used to embed a thesis project (title, description, research fields)"""
+    return "\n".join([
+        f"Title: {_as_text(project.get('Title'))}",
+        f"Description: {_as_text(project.get('Description'))}",
+        f"Research Fields: {_as_text(project.get('Research Fields'))}",
+    ])
+
+
+def cosine_similarity(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of one query vector against every row of matrix"""
+    if matrix.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    row_norms = np.linalg.norm(matrix, axis=1)
+    denom = np.maximum(row_norms * query_norm, 1e-12)
+    return (matrix @ query) / denom
+
+
+def top_k_indices(similarities: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most similar rows, most similar first"""
+    k = min(k, len(similarities))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = np.argpartition(-similarities, k - 1)[:k]
+    # Stable sort so equal similarities keep their input order
+    return candidates[np.argsort(-similarities[candidates], kind="stable")]
+
+
+class EmbeddingClient:
+    """
+    Thin wrapper around the OpenAI embeddings endpoint returning NumPy arrays.
+
+    Recently embedded texts are memoized process-wide (per model), so a
+    vector computed ahead of time, e.g. by the speculative prefetch, is
+    reused by later callers without another request.
+    """
+
+    memo_size = 1024
+    _memo: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+    _memo_lock = threading.Lock()
+
+    def __init__(
+        self,
+        openai_api_key: Optional[str] = None,
+        model: str = "text-embedding-3-small",
+        batch_size: int = 256,
+        client: Optional[OpenAI] = None,
+        priority: int = BATCH,
+    ):
+        self.scheduler = get_scheduler()
+        self.priority = priority
+        self.client = client if client is not None else OpenAI(api_key=openai_api_key)
+        self.model = model
+        self.batch_size = batch_size
+
+    def _memo_get(self, text: str) -> Optional[np.ndarray]:
+        with self._memo_lock:
+            vector = self._memo.get((self.model, text))
+            if vector is not None:
+                self._memo.move_to_end((self.model, text))
+            return vector
+
+    def _memo_set(self, text: str, vector: np.ndarray) -> None:
+        with self._memo_lock:
+            self._memo[(self.model, text)] = vector
+            self._memo.move_to_end((self.model, text))
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in batches; returns a float32 array of shape (len(texts), dim)"""
+        texts = [text or " " for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self._memo_get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        for i, vector in zip(missing, self._embed_uncached([texts[i] for i in missing])):
+            vectors[i] = vector
+            self._memo_set(texts[i], vector)
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+    def _embed_uncached(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            response = self.scheduler.call(
+                "openai",
+                self.model,
+                lambda: self.client.embeddings.create(model=self.model, input=batch),
+                tokens=sum(count_tokens(text) for text in batch),
+                priority=self.priority,
+            )
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(vectors, dtype=np.float32)
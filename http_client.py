@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_HEADERS = {"User-Agent": "AIgenTUM-thesis-scraper/1.0"}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    text: str
+    from_cache: bool = False
+
+
+class HTTPCache:
+    """
+    On-disk store of page bodies plus their ETag / Last-Modified validators.
+    One JSON file per URL, named by the SHA-256 of the URL.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = "cache/http"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[Dict]:
+        path = self._entry_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, url: str, response: Union[requests.Response, httpx.Response]) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        # Without a validator the entry could never be revalidated
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "text": response.text,
+        }
+        path = self._entry_path(url)
+        # Unique per writer: threads and processes may store the same URL at once
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        tmp_path.replace(path)
+
+
+class HTTPClient:
+    """
+    Pooled HTTP client shared by the scraping tools.
+
+    Keeps connections alive across requests, limits connections per host and
+    revalidates cached pages with If-None-Match / If-Modified-Since so that an
+    unchanged page comes back as a cheap 304.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        timeout: Tuple[float, float] = (5, 20),
+        max_connections_per_host: int = 4,
+        max_hosts: int = 16,
+        max_retries: int = 2,
+    ):
+        self.cache = cache if cache is not None else HTTPCache()
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=max_hosts,
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+            max_retries=max_retries,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "downloaded": 0}
+
+    def get(self, url: str) -> FetchResult:
+        """GET a page, revalidating against the on-disk cache. Raises on HTTP errors."""
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and cached:
+            self._count("not_modified")
+            return FetchResult(url=url, status_code=304, text=cached["text"], from_cache=True)
+
+        response.raise_for_status()
+        self._count("downloaded")
+        self.cache.set(url, response)
+        return FetchResult(url=url, status_code=response.status_code, text=response.text)
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[outcome] += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncHTTPClient:
+    """
+    Async counterpart of HTTPClient on httpx.AsyncClient.
+
+    Shares the on-disk HTTPCache, so pages revalidated by either client are
+    served as 304s to both. Connections per host are bounded with a semaphore.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        timeout: Tuple[float, float] = (5, 20),
+        max_connections_per_host: int = 4,
+        max_connections: int = 64,
+        max_retries: int = 2,
+    ):
+        self.cache = cache if cache is not None else HTTPCache()
+        connect_timeout, read_timeout = timeout
+        self.client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections),
+            transport=httpx.AsyncHTTPTransport(retries=max_retries),
+            follow_redirects=True,
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"requests": 0, "not_modified": 0, "downloaded": 0}
+
+    async def get(self, url: str) -> FetchResult:
+        """GET a page, revalidating against the on-disk cache. Raises on HTTP errors."""
+        # Cache file I/O runs in a worker thread to keep the event loop free
+        cached = await asyncio.to_thread(self.cache.get, url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = httpx.URL(url).host
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.max_connections_per_host))
+        async with semaphore:
+            response = await self.client.get(url, headers=headers)
+
+        self.stats["requests"] += 1
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return FetchResult(url=url, status_code=304, text=cached["text"], from_cache=True)
+
+        response.raise_for_status()
+        self.stats["downloaded"] += 1
+        await asyncio.to_thread(self.cache.set, url, response)
+        return FetchResult(url=url, status_code=response.status_code, text=response.text)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_default_client: Optional[HTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide shared HTTPClient"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
+
+
+# httpx.AsyncClient connections belong to one event loop, so keep one client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHTTPClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """Return the shared AsyncHTTPClient of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncHTTPClient()
+        _async_clients[loop] = client
+    return client
+
+
+# Open async_http_session() scopes per event loop
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def async_http_session() -> AsyncIterator[AsyncHTTPClient]:
+    """
+    Scope of an async scraping run on the running loop's shared client.
+    The client is closed when the last open session of the loop ends.
+    """
+    loop = asyncio.get_running_loop()
+    client = get_async_http_client()
+    _async_sessions[loop] = _async_sessions.get(loop, 0) + 1
+    try:
+        yield client
+    finally:
+        _async_sessions[loop] -= 1
+        if _async_sessions[loop] == 0:
+            del _async_sessions[loop]
+            if _async_clients.get(loop) is client:
+                del _async_clients[loop]
+            await client.aclose()
@@ -0,0 +1,325 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+INTERRUPTED = "interrupted"  # its process stopped while it was queued or running; resumable
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: Optional[str]
+    status: str
+    progress: float
+    message: str
+    params: Dict[str, Any]
+    partial: Optional[Any]
+    result: Optional[Any]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+    owner: Optional[str] = None  # "<host>:<pid>:<runner>" of the JobRunner running the job
+    heartbeat: Optional[float] = None  # last time the owner reported the job alive
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+class JobStore:
+    """
+    SQLite table of background jobs.
+
+    Status, progress, partial results and the final result survive a browser
+    refresh or a restart of the Streamlit server; only the running thread
+    does not.
+    """
+
+    def __init__(self, path: Union[str, Path] = "cache/jobs.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                key TEXT,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT NOT NULL DEFAULT '',
+                params TEXT NOT NULL,
+                partial TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT,
+                heartbeat REAL
+            )"""
+        )
+        # Tables created before jobs had owners
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_kind_key ON jobs (kind, key)")
+        self._conn.commit()
+
+    @staticmethod
+    def _to_job(row) -> Job:
+        (id_, kind, key, status, progress, message, params, partial, result, error,
+         created_at, updated_at, owner, heartbeat) = row
+        return Job(
+            id=id_, kind=kind, key=key, status=status, progress=progress, message=message,
+            params=json.loads(params),
+            partial=json.loads(partial) if partial is not None else None,
+            result=json.loads(result) if result is not None else None,
+            error=error, created_at=created_at, updated_at=updated_at,
+            owner=owner, heartbeat=heartbeat,
+        )
+
+    def create(
+        self, kind: str, params: Dict[str, Any], key: Optional[str] = None, owner: Optional[str] = None
+    ) -> Job:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, key, status, params, created_at, updated_at, owner, heartbeat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, key, QUEUED, json.dumps(params), now, now, owner, now),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def latest(self, kind: str, key: Optional[str]) -> Optional[Job]:
+        """Most recently created job of kind for key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND key IS ? ORDER BY created_at DESC LIMIT 1",
+                (kind, key),
+            ).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def with_status(self, *statuses: str) -> List[Job]:
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at", statuses
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Set columns of a job; partial and result are stored as JSON"""
+        for name in ("partial", "result"):
+            if name in fields:
+                fields[name] = json.dumps(fields[name])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+            self._conn.commit()
+
+    def claim(self, job_id: str, owner: str, expected_owner: Optional[str], expected_status: str, **fields: Any) -> bool:
+        """
+        Atomically make owner the owner of a job that is still owned by
+        expected_owner in expected_status, setting fields as well. Returns
+        False if another runner changed the job first.
+        """
+        fields.update(owner=owner, heartbeat=time.time(), updated_at=time.time())
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            claimed = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND owner IS ? AND status = ?",
+                (*fields.values(), job_id, expected_owner, expected_status),
+            ).rowcount
+            self._conn.commit()
+        return claimed == 1
+
+    def beat(self, job_ids: List[str], owner: str) -> None:
+        """Record that owner is still running job_ids"""
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET heartbeat = ? WHERE owner = ? AND id IN ({placeholders})",
+                (time.time(), owner, *job_ids),
+            )
+            self._conn.commit()
+
+
+class JobContext:
+    """Handle passed to a running job to report progress and checkpoint partial results"""
+
+    def __init__(self, store: JobStore, job: Job):
+        self.store = store
+        self.job_id = job.id
+        self.params = job.params
+        # Partial result saved by a previous, interrupted run of this job
+        self.partial = job.partial
+
+    def report_progress(self, progress: float, message: str = "") -> None:
+        self.store.update(self.job_id, progress=max(0.0, min(1.0, progress)), message=message)
+
+    def save_partial(self, partial: Any) -> None:
+        self.partial = partial
+        self.store.update(self.job_id, partial=partial)
+
+
+class JobRunner:
+    """
+    Runs registered job kinds on a thread pool, persisting their state in a JobStore.
+
+    Handlers are registered per kind as fn(context) -> JSON-serializable
+    result. Every job records its owner (host, pid and runner) and a
+    heartbeat the owner refreshes every heartbeat_interval seconds, so
+    several server processes can share one job table. A queued or running
+    job whose owner process is gone (same host) or whose heartbeat is older
+    than stale_after is marked INTERRUPTED and taken over by this runner.
+
+    Resuming runs the handler again from the start with context.partial
+    set to the last checkpoint. The matching job only checkpoints its stage
+    name, so a resumed run repeats every stage and relies on LLMCache hits
+    to skip the model calls that had already completed.
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        max_workers: int = 2,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+    ):
+        self.store = store if store is not None else JobStore()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.handlers: Dict[str, Callable[[JobContext], Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.recover_orphans()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def register(self, kind: str, handler: Callable[[JobContext], Any]) -> None:
+        self.handlers[kind] = handler
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self._lock:
+                    job_ids = list(self._futures)
+                if job_ids:
+                    self.store.beat(job_ids, self.owner)
+                # Take over the jobs of processes that stopped since start-up
+                if self.recover_orphans():
+                    self.resume_interrupted()
+            except Exception:
+                traceback.print_exc()
+
+    def is_orphaned(self, job: Job) -> bool:
+        """True if job is queued or running but its owner no longer runs it"""
+        if job.status not in ACTIVE_STATES or job.owner == self.owner:
+            return False
+        if job.owner is not None:
+            host, pid = job.owner.split(":")[:2]
+            if host == self.host:
+                try:
+                    os.kill(int(pid), 0)
+                except ProcessLookupError:
+                    return True
+                except (PermissionError, ValueError):
+                    pass
+        last_seen = job.heartbeat if job.heartbeat is not None else job.updated_at
+        return time.time() - last_seen > self.stale_after
+
+    def recover_orphans(self) -> List[Job]:
+        """Mark queued or running jobs whose owner is gone as INTERRUPTED"""
+        recovered = []
+        for job in self.store.with_status(*ACTIVE_STATES):
+            if self.is_orphaned(job) and self.store.claim(
+                job.id, self.owner, job.owner, job.status,
+                status=INTERRUPTED, message="Interrupted: the server running it stopped",
+            ):
+                recovered.append(self.store.get(job.id))
+        return recovered
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        self.store.update(job_id, status=RUNNING, error=None, heartbeat=time.time())
+        try:
+            result = self.handlers[job.kind](JobContext(self.store, job))
+            self.store.update(job_id, status=DONE, progress=1.0, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            self.store.update(job_id, status=FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def _start(self, job_id: str) -> None:
+        with self._lock:
+            if job_id not in self._futures:
+                self._futures[job_id] = self.executor.submit(self._run, job_id)
+
+    def submit(self, kind: str, params: Dict[str, Any], key: Optional[str] = None) -> Job:
+        """
+        Queue a job. An active job of the same kind and key is returned instead
+        of starting a duplicate, and an interrupted or orphaned one is resumed.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        existing = self.store.latest(kind, key)
+        if existing is not None and existing.status in ACTIVE_STATES and not self.is_orphaned(existing):
+            return existing
+        if existing is not None and (existing.status == INTERRUPTED or self.is_orphaned(existing)):
+            return self.resume(existing.id)
+        job = self.store.create(kind, params, key, owner=self.owner)
+        self._start(job.id)
+        return job
+
+    def resume(self, job_id: str) -> Job:
+        """Run an interrupted, orphaned or failed job again, keeping its partial result"""
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status == DONE or (job.status in ACTIVE_STATES and not self.is_orphaned(job)):
+            return job
+        # Only one runner wins the claim when several try to resume the same job
+        if self.store.claim(job_id, self.owner, job.owner, job.status, status=QUEUED, message="Resuming"):
+            self._start(job_id)
+        return self.store.get(job_id)
+
+    def resume_interrupted(self) -> List[Job]:
+        return [self.resume(job.id) for job in self.store.with_status(INTERRUPTED) if job.kind in self.handlers]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache for LLM responses.
+
+    Entries are stored in a SQLite database keyed by the SHA-256 of the request
+    (backend, model, temperature, response_format and normalized messages).
+    Entries older than `ttl` seconds are treated as misses, and the least
+    recently used entries are evicted once the stored responses exceed `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "cache/llm_cache.sqlite",
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_bytes: int = 100 * 1024 * 1024,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Reduce messages to their role and whitespace-trimmed content"""
+        return [
+            {"role": str(m["role"]), "content": str(m["content"]).strip()}
+            for m in messages
+        ]
+
+    def make_key(
+        self,
+        backend: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Build the content address of a completion request"""
+        payload = {
+            "backend": backend,
+            "model": model,
+            "temperature": temperature,
+            "response_format": response_format,
+            "messages": self.normalize_messages(messages),
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Optional[str]) -> None:
+        """
+        Store a response and evict least recently used entries if over budget.
+        None and empty responses are not stored, so a failed call is retried.
+        """
+        if not value:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Optional[str]]) -> Optional[str]:
+        """Return the cached response for key, or call compute() and store its result"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.set(key, value)
+        return value
+
+    async def aget_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """
+        Async counterpart of get_or_compute; compute() returns an awaitable.
+        SQLite access runs in a worker thread so it does not block the event loop.
+        """
+        cached = await asyncio.to_thread(self.get, key)
+        if cached is not None:
+            return cached
+        value = await compute()
+        await asyncio.to_thread(self.set, key, value)
+        return value
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def __str__(self) -> str:
+        stats = self.stats()
+        return (
+            f"LLMCache(hits={stats['hits']}, misses={stats['misses']}, "
+            f"entries={stats['entries']}, bytes={stats['bytes']})"
+        )
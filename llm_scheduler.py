@@ -0,0 +1,239 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from tokens import count_tokens
+
+
+# Priority lanes: lower value is served first
+INTERACTIVE = 0
+BATCH = 1
+
+
+@dataclass
+class RateLimit:
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+# Conservative defaults per (provider, model); "*" matches any model of a provider
+DEFAULT_LIMITS: Dict[Tuple[str, str], RateLimit] = {
+    ("openai", "gpt-4o"): RateLimit(500, 30000),
+    ("openai", "gpt-3.5-turbo"): RateLimit(3500, 200000),
+    ("openai", "text-embedding-3-small"): RateLimit(3000, 1000000),
+    ("openai", "*"): RateLimit(500, 30000),
+    ("groq", "*"): RateLimit(30, 6000),
+    ("ollama", "*"): RateLimit(600, 10000000),
+}
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.available = rate_per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (0 if it is available now)"""
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_output_tokens: int = 500) -> int:
+    """Token cost charged against the tokens/min bucket before a request is sent"""
+    prompt = sum(count_tokens(str(m.get("content", ""))) + 4 for m in messages)
+    return prompt + max_output_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the provider through Retry-After / retry-after-ms, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class RateLimitScheduler:
+    """
+    Central gate for all LLM calls in the process.
+
+    Each (provider, model) pair has a requests/min and a tokens/min token
+    bucket. Callers wait until both buckets have capacity; a waiting
+    INTERACTIVE caller is always served before BATCH callers of the same
+    model. Rate-limited calls (HTTP 429) are retried with jittered
+    exponential backoff that honors Retry-After, and the whole model is
+    paused for that delay so other callers do not hit the limit too.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[Tuple[str, str], RateLimit]] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.limits = dict(DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._buckets: Dict[Tuple[str, str], Tuple[TokenBucket, TokenBucket]] = {}
+        self._paused_until: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._waiting: Dict[Tuple[str, str], Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.stats = {"requests": 0, "rate_limited": 0, "waited_seconds": 0.0}
+
+    def _limit(self, provider: str, model: str) -> RateLimit:
+        return (
+            self.limits.get((provider, model))
+            or self.limits.get((provider, "*"))
+            or RateLimit(60, 100000)
+        )
+
+    def _buckets_for(self, key: Tuple[str, str]) -> Tuple[TokenBucket, TokenBucket]:
+        if key not in self._buckets:
+            limit = self._limit(*key)
+            self._buckets[key] = (
+                TokenBucket(limit.requests_per_minute),
+                TokenBucket(limit.tokens_per_minute),
+            )
+        return self._buckets[key]
+
+    def _try_reserve(self, key: Tuple[str, str], tokens: int, priority: int) -> float:
+        """Reserve capacity and return 0, or return how long to wait. Caller holds _cond."""
+        now = time.monotonic()
+        if self._paused_until[key] > now:
+            return self._paused_until[key] - now
+        if any(self._waiting[key][p] for p in range(priority)):
+            # A higher-priority caller is waiting for this model
+            return 0.05
+        requests_bucket, tokens_bucket = self._buckets_for(key)
+        requests_bucket.refill(now)
+        tokens_bucket.refill(now)
+        wait = max(requests_bucket.wait_time(1), tokens_bucket.wait_time(tokens))
+        if wait == 0:
+            requests_bucket.available -= 1
+            tokens_bucket.available -= min(tokens, tokens_bucket.capacity)
+            self.stats["requests"] += 1
+        return wait
+
+    def acquire(self, provider: str, model: str, tokens: int = 1, priority: int = BATCH) -> None:
+        """Block until a request of the given size may be sent"""
+        key = (provider, model)
+        started = time.monotonic()
+        with self._cond:
+            self._waiting[key][priority] += 1
+            try:
+                while True:
+                    wait = self._try_reserve(key, tokens, priority)
+                    if wait == 0:
+                        return
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting[key][priority] -= 1
+                self.stats["waited_seconds"] += time.monotonic() - started
+                self._cond.notify_all()
+
+    async def aacquire(self, provider: str, model: str, tokens: int = 1, priority: int = BATCH) -> None:
+        """Async counterpart of acquire; waits with asyncio.sleep instead of blocking"""
+        key = (provider, model)
+        started = time.monotonic()
+        with self._cond:
+            self._waiting[key][priority] += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_reserve(key, tokens, priority)
+                if wait == 0:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            with self._cond:
+                self._waiting[key][priority] -= 1
+                self.stats["waited_seconds"] += time.monotonic() - started
+                self._cond.notify_all()
+
+    def _backoff(self, key: Tuple[str, str], error: Exception, attempt: int) -> float:
+        """Delay before the next attempt; pauses the model for everyone"""
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+            delay = random.uniform(delay / 2, delay)  # jitter
+        with self._cond:
+            self.stats["rate_limited"] += 1
+            self._paused_until[key] = max(self._paused_until[key], time.monotonic() + delay)
+        print(f"Rate limited by {key[0]}/{key[1]}, retrying in {delay:.1f}s")
+        return delay
+
+    def call(
+        self,
+        provider: str,
+        model: str,
+        fn: Callable[[], Any],
+        tokens: int = 1,
+        priority: int = BATCH,
+    ) -> Any:
+        """Run fn under the rate limits of provider/model, retrying on 429"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(provider, model, tokens, priority)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff((provider, model), e, attempt))
+
+    async def acall(
+        self,
+        provider: str,
+        model: str,
+        fn: Callable[[], Awaitable[Any]],
+        tokens: int = 1,
+        priority: int = BATCH,
+    ) -> Any:
+        """Async counterpart of call; fn returns an awaitable"""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(provider, model, tokens, priority)
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff((provider, model), e, attempt))
+
+
+_default_scheduler: Optional[RateLimitScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Return the process-wide scheduler shared by every LLM caller"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RateLimitScheduler()
+        return _default_scheduler
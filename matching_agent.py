@@ -1,20 +1,20 @@
 from pathlib import Path
 import json
 import os
-from typing import Dict, List, Any
+import threading
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 from openai import OpenAI
-
-@dataclass
-class StudentProfile:
-    interests: List[str]
-    skills: List[str]
-    courses: List[Dict[str, str]]  # [{name: grade}]
-    preferred_topics: List[str]
-    cv_summary: str
-    gpa: float
+from pydantic import BaseModel, Field, ValidationError
+from llm_cache import LLMCache
+from tokens import count_tokens
+from llm_scheduler import BATCH, estimate_tokens, get_scheduler
+from opportunity_index import OpportunityIndex
+from profile_store import ProfileStore, StudentProfile
+from embeddings import EmbeddingClient, cosine_similarity, project_text, student_profile_text, top_k_indices
 
 @dataclass
 class ThesisProject:
@@ -25,6 +25,32 @@ class ThesisProject:
     chair_name: str
     source_url: str
 
+@dataclass
+class ChairFileError:
+    """A chair file that could not be parsed and was skipped"""
+    path: str
+    error: str
+
+class MatchAnalysis(BaseModel):
+    """Structured result of analyze_match, validated from the model's JSON output"""
+    score: int = Field(ge=0, le=100)
+    strengths: List[str] = Field(default_factory=list)
+    gaps: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    analysis: str = ""
+
+def format_match_analysis(result: MatchAnalysis) -> str:
+    """Render a MatchAnalysis in the numbered layout of the text report"""
+    sections = [f"1. Match Score (0-100): {result.score}"]
+    for number, title, items in [
+        (2, "Key Strengths", result.strengths),
+        (3, "Potential Gaps", result.gaps),
+        (4, "Recommendations", result.recommendations),
+    ]:
+        sections.append(f"{number}. {title}:\n" + "\n".join(f"- {item}" for item in items))
+    sections.append(f"5. Detailed Analysis:\n{result.analysis}")
+    return "\n\n".join(sections)
+
 def parse_chair_data(content: str) -> tuple[dict, list]:
     """
     Parse chair data and thesis opportunities from aggregated text file.
@@ -32,7 +58,6 @@ def parse_chair_data(content: str) -> tuple[dict, list]:
     """
     # Split into chair info and thesis opportunities
     sections = content.split("THESIS OPPORTUNITIES:")
-    print('>>>>> ',len(sections))
     if len(sections) != 2:
         raise ValueError("Invalid format: Could not find THESIS OPPORTUNITIES section")
     
@@ -106,165 +131,431 @@ def parse_chair_data(content: str) -> tuple[dict, list]:
     return chair_info, opportunities
 
 
+# Cold parses of at least this many chair files run in a process pool
+PARALLEL_PARSE_THRESHOLD = 8
+
+def _parse_chair_file(path: str) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            _, opportunities = parse_chair_data(f.read())
+        return opportunities, None
+    except (ValueError, OSError, UnicodeDecodeError) as e:
+        return None, str(e)
+
+def parse_chair_files(paths: List[Path]) -> List[Tuple[Optional[List[Dict]], Optional[str]]]:
+    """
+    Parse chair files, in parallel processes when there are many.
+    Returns (opportunities, None) or (None, error) per file, in input order.
+    """
+    paths = [str(path) for path in paths]
+    if len(paths) < PARALLEL_PARSE_THRESHOLD:
+        return [_parse_chair_file(path) for path in paths]
+    workers = min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_chair_file, paths, chunksize=-(-len(paths) // workers)))
+
+
 class ThesisMatchingAgent:
-    def __init__(self, openai_api_key: str):
+    def __init__(
+        self,
+        openai_api_key: str,
+        max_concurrency: int = 8,
+        cache: LLMCache = None,
+        top_k: Optional[int] = None,
+        evaluate_prefilter: bool = False,
+        index: Optional[OpportunityIndex] = None,
+        scoring_mode: str = "per_project",
+        batch_size: int = 10,
+        detail_top_n: int = 5,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        profile_store: Optional[ProfileStore] = None,
+    ):
+        if scoring_mode not in ("per_project", "batched"):
+            raise ValueError("scoring_mode must be 'per_project' or 'batched'")
         self.client = OpenAI(api_key=openai_api_key)
+        self.scheduler = get_scheduler()
+        # "batched": score batch_size projects per request and only write the
+        # detailed analysis for the detail_top_n best ones
+        self.scoring_mode = scoring_mode
+        self.batch_size = max(1, batch_size)
+        self.detail_top_n = detail_top_n
+        self.last_token_report = None
+        self.embedding_client = EmbeddingClient(client=self.client)
+        # Only the top_k projects by embedding similarity go to the LLM (None = all)
+        self.top_k = top_k
+        # Score every project anyway and report how much recall top_k would keep
+        self.evaluate_prefilter = evaluate_prefilter
+        # Optional persistent OpportunityIndex used instead of re-parsing chair files
+        self.index = index
+        # Optional persistent response cache shared with agent_builder.Agent
+        self.cache = cache
+        # Chair files skipped by the last load_thesis_data / search_index call
+        self.parse_errors: List[ChairFileError] = []
+        # Student profiles written by StudentAgent
+        self.profile_store = profile_store if profile_store is not None else ProfileStore()
+        # Called as progress_callback(stage, done, total), e.g. by the background job runner
+        self.progress_callback = progress_callback
+        # Maximum number of analyze_match requests in flight at once (1 = sequential)
+        self.max_concurrency = max(1, max_concurrency)
         self.output_dir = Path("matching_results")
         self.output_dir.mkdir(exist_ok=True)
 
 
-    def load_student_data(self, student_dir: Path) -> Dict:
+    def load_student_data(self, student_dir: Path) -> StudentProfile:
         """
-        Load student data from the directory containing:
-        - student_data.json
-        - cv_summary.txt
-        - transcript_summary.txt
+        Load the student's typed profile from the profile store in one read.
+        Profiles saved as loose files (student_data.json, cv_summary.txt,
+        transcript_summary.txt) are imported into the store the first time.
         """
         try:
-            # Load the JSON data
-            with open(student_dir / "student_data.json", "r", encoding='utf-8') as f:
-                student_data = json.load(f)
-            
-            # Load CV summary
-            with open(student_dir / "cv_summary.txt", "r", encoding='utf-8') as f:
-                cv_summary = f.read().strip()
-                
-            # Load transcript summary
-            with open(student_dir / "transcript_summary.txt", "r", encoding='utf-8') as f:
-                transcript_summary = f.read().strip()
-            
-            # Combine all data
-            student_profile = {
-                # Core information
-                "cv_summary": cv_summary,
-                "transcript_summary": transcript_summary,
-                
-                # From JSON file
-                "interests": student_data.get("interests", []),
-                "preferred_topics": student_data.get("preferred_topics", []),
-                "skills": student_data.get("skills", []),
-                "gpa": student_data.get("gpa", "Not available"),
-                "courses": student_data.get("courses", []),
-                
-                # Additional data if available
-                "personal_info": student_data.get("personal_info", {}),
-                "motivation_letter_text": student_data.get("motivation_letter_text", None),
-            }
-            
-            # Add key areas of study if available in transcript summary
-            if "Key Areas of Study:" in transcript_summary:
-                areas = transcript_summary.split("Key Areas of Study:")[1].strip()
-                student_profile["key_areas"] = [
-                    area.strip("- ") 
-                    for area in areas.split("\n") 
-                    if area.strip().startswith("-")
-                ]
-            
-            return student_profile
-            
+            return self.profile_store.load_or_import(student_dir)
         except FileNotFoundError as e:
             raise Exception(f"Missing required student file: {e.filename}")
         except json.JSONDecodeError:
             raise Exception("Invalid student_data.json file")
         except Exception as e:
             raise Exception(f"Error loading student data: {str(e)}")
-        
 
     def load_thesis_data(self, thesis_data_dir: Path) -> List[Dict]:
-        """Load all thesis opportunities from the chair files"""
-        all_projects = []
-        
-        # Process each chair file
-        for file_path in thesis_data_dir.glob("*.txt"):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                print('>>>>> ',file_path)
-                content = f.read()
-                
-            chair_info, projects = parse_chair_data(content)
-            all_projects.extend(projects)
-            
+        """
+        Load all thesis opportunities from the chair files. With an index,
+        each distinct file content is parsed once and shared by every student
+        linking it; without one, the files are parsed in parallel. Files that
+        cannot be parsed are skipped and recorded in self.parse_errors.
+        """
+        if self.index is not None:
+            print(f"Opportunity index: {self.index.update(thesis_data_dir)}")
+            all_projects = self.index.projects(thesis_data_dir)
+            errors = list(self.index.errors(thesis_data_dir).items())
+        else:
+            paths = sorted(thesis_data_dir.glob("*.txt"))
+            all_projects, errors = [], []
+            for path, (projects, error) in zip(paths, parse_chair_files(paths)):
+                if error is not None:
+                    errors.append((str(path), error))
+                else:
+                    all_projects.extend(projects)
+
+        self.parse_errors = [ChairFileError(path=path, error=error) for path, error in errors]
+        for error in self.parse_errors:
+            print(f"Skipped {error.path}: {error.error}")
         return all_projects
 
-    def analyze_match(self, student: StudentProfile, project: Dict) -> Dict:
-        """Analyze how well a student matches a thesis project"""
-        prompt = f"""Analyze how well this student matches the thesis project. Consider all aspects carefully.
+    def build_match_prompt(self, student: StudentProfile, project: Dict) -> str:
+        """Prompt for the detailed analysis of one student/project pair"""
+        return f"""Analyze how well this student matches the thesis project. Consider all aspects carefully.
 
                     STUDENT PROFILE:
-                    CV Summary: {student['cv_summary']}
+                    CV Summary: {student.cv_summary}
 
                     Academic Performance:
-                    {student['transcript_summary']}
+                    {student.transcript_summary}
 
-                    Interests: {', '.join(student['interests'])}
-                    Preferred Topics: {', '.join(student['preferred_topics'])}
-                    Skills: {', '.join(student['skills'])}
-                    GPA: {student['gpa']}
+                    Interests: {', '.join(student.interests)}
+                    Preferred Topics: {', '.join(student.preferred_topics)}
+                    Skills: {', '.join(student.skills)}
+                    GPA: {student.gpa or 'Not available'}
 
                     THESIS PROJECT:
                     Title: {project['Title']}
                     Type: {project['Type']}
                     Chair: {project['chair_name']}
                     Description: {project['Description']}
-                    Research Fields: {', '.join(project['Research Fields'])}
+                    Research Fields: {', '.join(project['Research Fields'] or [])}
                     Technical Requirements: {project.get('Rechnical Requirements', 'Not specified')}
                     Academic Requirements: {project.get('Academic Requirements', 'Not specified')}
                     Contact: {project.get('contact_person', project['chair_contact'])}
 
-                    Provide a detailed analysis with the following structure:
+                    Provide a detailed analysis as a JSON object with exactly these fields:
 
-                    1. Match Score (0-100):
+                    {{
+                        "score": match score from 0 to 100 (integer),
+                        "strengths": [the student's strongest matching points, relevant courses and grades, matching skills and interests],
+                        "gaps": [missing requirements, areas needing improvement, preparation steps],
+                        "recommendations": [specific actions to improve the match, suggested preparation, points to emphasize in the application],
+                        "analysis": "detailed analysis of academic alignment, technical preparation, research interest fit and experience relevance"
+                    }}
 
-                    2. Key Strengths:
-                    - List the student's strongest matching points
-                    - Highlight relevant courses and grades
-                    - Note matching skills and interests
+                    Be specific and reference actual courses, skills, and experiences from the student's profile.
+                    """
 
-                    3. Potential Gaps:
-                    - Identify missing requirements
-                    - Note areas needing improvement
-                    - Suggest preparation steps
+    def analyze_match(self, student: StudentProfile, project: Dict) -> Dict:
+        """
+        Analyze how well a student matches a thesis project. A failed request
+        returns a match with an 'error' instead of aborting the whole report.
+        """
+        try:
+            prompt = self.build_match_prompt(student, project)
+            content = self._chat_completion(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "You are an expert at matching students with thesis projects."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+            )
+        except Exception as e:
+            print(f"Could not analyze {project.get('Title')}: {e}")
+            return {
+                "analysis": None,
+                "structured": None,
+                "thesis": project,
+                "score": 0,
+                "error": str(e),
+            }
+
+        try:
+            result = MatchAnalysis.model_validate_json(content)
+        except ValidationError as e:
+            print(f"Invalid match analysis for {project['Title']}: {e}")
+            return {
+                "analysis": content,
+                "structured": None,
+                "thesis": project,
+                "score": 0,
+                "error": str(e),
+            }
 
-                    4. Recommendations:
-                    - Specific actions to improve match
-                    - Suggested preparation
-                    - Points to emphasize in application
+        return {
+            "analysis": format_match_analysis(result),
+            "structured": result.model_dump(),
+            "thesis": project,
+            "score": result.score
+        }
 
-                    5. Detailed Analysis:
-                    - Academic alignment
-                    - Technical preparation
-                    - Research interest fit
-                    - Experience relevance
+    def build_batch_prompt(self, student: StudentProfile, projects: List[Dict]) -> str:
+        """Prompt scoring several projects at once, with the student profile sent once"""
+        project_blocks = "\n\n".join(
+            f"""PROJECT {i}:
+Title: {project['Title']}
+Type: {project['Type']}
+Chair: {project['chair_name']}
+Description: {project['Description']}
+Research Fields: {', '.join(project['Research Fields'] or [])}
+Technical Requirements: {project.get('Technical Requirements') or 'Not specified'}
+Academic Requirements: {project.get('Academic Requirements') or 'Not specified'}"""
+            for i, project in enumerate(projects)
+        )
+        return f"""Score how well this student matches each of the thesis projects below.
 
-                    Be specific and reference actual courses, skills, and experiences from the student's profile.
-                    """
-        response = self.client.chat.completions.create(
+STUDENT PROFILE:
+CV Summary: {student.cv_summary}
+
+Academic Performance:
+{student.transcript_summary}
+
+Interests: {', '.join(student.interests)}
+Preferred Topics: {', '.join(student.preferred_topics)}
+Skills: {', '.join(student.skills)}
+GPA: {student.gpa or 'Not available'}
+
+{project_blocks}
+
+Consider academic alignment, technical preparation, research interest fit and experience relevance.
+Respond with a JSON object of the form:
+{{"scores": [{{"project": <project number>, "score": <match score 0-100>}}]}}
+Include every project exactly once."""
+
+    def score_batch(self, student: StudentProfile, projects: List[Dict]) -> List[Optional[int]]:
+        """Score several projects in one JSON request; unscored projects get None"""
+        content = self._chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an expert at matching students with thesis projects."},
-                {"role": "user", "content": prompt}
-            ]
+                {"role": "user", "content": self.build_batch_prompt(student, projects)}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0,
         )
-        
-        return {
-            "analysis": response.choices[0].message.content,
-            "thesis": project,
-            "score": self.extract_score(response.choices[0].message.content)
-        }
+        scores: List[Optional[int]] = [None] * len(projects)
+        try:
+            for item in json.loads(content).get("scores", []):
+                i = int(item["project"])
+                if 0 <= i < len(projects):
+                    scores[i] = max(0, min(100, int(item["score"])))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+            print(f"Could not parse batch scores: {content[:200]}")
+        return scores
+
+    def batch_analyze(self, student: StudentProfile, projects: List[Dict]) -> List[Dict]:
+        """
+        Score all projects in batches of batch_size, then generate the detailed
+        analysis only for the detail_top_n best projects. Input order is kept.
+        """
+        batches = [projects[i:i + self.batch_size] for i in range(0, len(projects), self.batch_size)]
+        batch_scores = self._map_concurrent(
+            lambda batch: self.score_batch(student, batch), batches, stage="Scoring projects"
+        )
+        scores = [score for batch in batch_scores for score in batch]
+
+        matches = []
+        for project, score in zip(projects, scores):
+            match = {"analysis": None, "structured": None, "thesis": project, "score": score or 0}
+            if score is None:
+                match["error"] = "No score was returned for this project"
+            matches.append(match)
+
+        # Detailed narrative analysis only for the final top matches
+        scored = [i for i, match in enumerate(matches) if "error" not in match]
+        top = sorted(scored, key=lambda i: matches[i]["score"], reverse=True)[:self.detail_top_n]
+        details = self._map_concurrent(
+            lambda i: self.analyze_match(student, projects[i]), top, stage="Writing detailed analyses"
+        )
+        for i, detail in zip(top, details):
+            matches[i]["analysis"] = detail["analysis"]
+            if detail.get("error"):
+                matches[i]["error"] = detail["error"]
+                continue
+            # The batch score ranks the matches, so the detailed analysis shows that same score
+            structured = MatchAnalysis(**{**detail["structured"], "score": matches[i]["score"]})
+            matches[i]["analysis"] = format_match_analysis(structured)
+            matches[i]["structured"] = structured.model_dump()
 
-    def extract_score(self, analysis: str) -> int:
-        """Extract numerical score from analysis text"""
         try:
-            score_line = [line for line in analysis.split('\n') if "Score" in line][0]
-            return int(''.join(filter(str.isdigit, score_line)))
-        except:
-            return 0
+            self.report_token_savings(student, projects, batches, top)
+        except Exception as e:
+            # Only a statistic: never fail a finished run over it
+            print(f"Could not compute token savings: {e}")
+        return matches
+
+    def report_token_savings(
+        self, student: StudentProfile, projects: List[Dict], batches: List[List[Dict]], detailed: List[int]
+    ) -> Dict[str, int]:
+        """Compare prompt tokens of batched scoring against one request per project"""
+        per_project = sum(count_tokens(self.build_match_prompt(student, project)) for project in projects)
+        batched = sum(count_tokens(self.build_batch_prompt(student, batch)) for batch in batches)
+        batched += sum(count_tokens(self.build_match_prompt(student, projects[i])) for i in detailed)
+        report = {
+            "per_project_prompt_tokens": per_project,
+            "batched_prompt_tokens": batched,
+            "saved_prompt_tokens": per_project - batched,
+            "requests_per_project": len(projects),
+            "requests_batched": len(batches) + len(detailed),
+        }
+        print(f"Batched scoring: {batched} prompt tokens in {report['requests_batched']} requests "
+              f"vs {per_project} in {len(projects)} per-project requests "
+              f"({report['saved_prompt_tokens']} saved)")
+        self.last_token_report = report
+        return report
+
+    def _report_progress(self, stage: str, done: int, total: int) -> None:
+        if self.progress_callback is not None:
+            self.progress_callback(stage, done, total)
+
+    def _map_concurrent(self, fn, items: List, stage: Optional[str] = None) -> List:
+        """Apply fn to items with up to max_concurrency calls in flight, keeping input order"""
+        if stage is not None and self.progress_callback is not None:
+            fn = self._with_progress(fn, stage, len(items))
+        if self.max_concurrency == 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items))) as executor:
+            # executor.map yields results in submission order
+            return list(executor.map(fn, items))
+
+    def _with_progress(self, fn, stage: str, total: int):
+        """Wrap fn so every completed call reports stage progress"""
+        lock = threading.Lock()
+        done = 0
+        self._report_progress(stage, 0, total)
+
+        def wrapped(item):
+            nonlocal done
+            result = fn(item)
+            with lock:
+                done += 1
+                count = done
+            self._report_progress(stage, count, total)
+            return result
+        return wrapped
+
+    def _chat_completion(self, model: str, messages: List[Dict], **params) -> str:
+        """Run an OpenAI chat completion, served from the cache when possible"""
+        def compute():
+            # Match scoring is batch work: interactive chat requests go first
+            response = self.scheduler.call(
+                "openai",
+                model,
+                lambda: self.client.chat.completions.create(model=model, messages=messages, **params),
+                tokens=estimate_tokens(messages, max_output_tokens=1000),
+                priority=BATCH,
+            )
+            return response.choices[0].message.content
+
+        if self.cache is None:
+            return compute()
+        cache_key = self.cache.make_key(
+            "openai",
+            model,
+            messages,
+            temperature=params.get("temperature"),
+            response_format=params.get("response_format"),
+        )
+        return self.cache.get_or_compute(cache_key, compute)
+
+    def analyze_matches(self, student: StudentProfile, projects: List[Dict]) -> List[Dict]:
+        """
+        Analyze all projects with up to max_concurrency requests in flight.
+        Results are returned in the same order as the input projects.
+        """
+        def analyze(project: Dict) -> Dict:
+            print(f"-- Analyzing match with {project['Title']}...")
+            match = self.analyze_match(student, project)
+            print(f"-----> Matched with {project['Title']} ({match['score']}%)")
+            return match
+
+        if self.scoring_mode == "batched":
+            return self.batch_analyze(student, projects)
+        return self._map_concurrent(analyze, projects, stage="Analyzing matches")
+
+    def embedding_similarities(self, student: StudentProfile, projects: List[Dict]) -> np.ndarray:
+        """Cosine similarity between the student profile and every project"""
+        vectors = self.embedding_client.embed(
+            [student_profile_text(student)] + [project_text(project) for project in projects]
+        )
+        return cosine_similarity(vectors[0], vectors[1:])
+
+    def prefilter_projects(self, projects: List[Dict], similarities: np.ndarray) -> List[Dict]:
+        """Keep the top_k most similar projects, in their original order"""
+        if self.top_k is None or len(projects) <= self.top_k:
+            return projects
+        keep = np.sort(top_k_indices(similarities, self.top_k))
+        return [projects[i] for i in keep]
+
+    @staticmethod
+    def recall_vs_cost(
+        similarities: np.ndarray, scores: List[int], k_values: List[int], n_relevant: int = 5
+    ) -> List[Dict]:
+        """
+        For each K, the share of the LLM's top n_relevant projects that the
+        embedding prefilter would have kept, and the share of LLM calls it costs.
+        """
+        total = len(scores)
+        if total == 0:
+            return []
+        relevant = set(top_k_indices(np.asarray(scores, dtype=np.float32), n_relevant).tolist())
+        report = []
+        for k in sorted(set(k_values)):
+            retrieved = set(top_k_indices(similarities, k).tolist())
+            report.append({
+                "k": k,
+                "llm_calls": min(k, total),
+                "cost_fraction": min(k, total) / total,
+                "recall": len(relevant & retrieved) / len(relevant),
+            })
+        return report
 
     def rank_matches(self, matches: List[Dict]) -> List[Dict]:
-        """Rank matches by score and add rankings"""
-        ranked = sorted(matches, key=lambda x: x['score'], reverse=True)
+        """
+        Rank analysed matches by score. Failed analyses (with an 'error') get
+        rank None and follow the ranked ones, so a failure never reads as a 0% match.
+        """
+        ranked = sorted((m for m in matches if not m.get('error')), key=lambda x: x['score'], reverse=True)
         for i, match in enumerate(ranked):
             match['rank'] = i + 1
-        return ranked
+        failed = [m for m in matches if m.get('error')]
+        for match in failed:
+            match['rank'] = None
+        return ranked + failed
 
     def generate_report(self, student: StudentProfile, matches: List[Dict]) -> str:
         """Generate a comprehensive matching report"""
@@ -274,50 +565,144 @@ class ThesisMatchingAgent:
 
                 STUDENT PROFILE SUMMARY
                 ----------------------
-                Interests: {', '.join(student['interests'])}
-                Skills: {', '.join(student['skills'])}
-                Preferred Topics: {', '.join(student['preferred_topics'])}
+                Interests: {', '.join(student.interests)}
+                Skills: {', '.join(student.skills)}
+                Preferred Topics: {', '.join(student.preferred_topics)}
 
                 TOP THESIS MATCHES
                 -----------------
 
                 """
         # Add top 5 matches with details
-        for match in matches[:5]:
+        ranked = [match for match in matches if match['rank'] is not None]
+        for match in ranked[:5]:
             report += f"\n{match['rank']}. {match['thesis']['Title']} ({match['score']}% Match)\n"
             report += f"Chair: {match['thesis']['chair_name']}\n"
             report += f"URL: {match['thesis']['URL']}\n"
-            report += f"\nAnalysis:\n{match['analysis']}\n"
+            report += f"\nAnalysis:\n{match['analysis'] or 'Not analyzed in detail.'}\n"
             report += "-" * 80 + "\n"
 
+        failed = [match for match in matches if match['rank'] is None]
+        if failed:
+            report += "\nCOULD NOT BE ANALYSED\n---------------------\n"
+            for match in failed:
+                report += f"- {match['thesis']['Title']} ({match['thesis']['chair_name']}): {match['error']}\n"
+
+        if self.parse_errors:
+            report += "\nSKIPPED CHAIR FILES\n-------------------\n"
+            for error in self.parse_errors:
+                report += f"- {Path(error.path).name}: {error.error}\n"
+
         return report
 
+    def generate_report_data(self, student: StudentProfile, matches: List[Dict]) -> Dict:
+        """Structured version of the report, saved as JSON next to the text report"""
+        return {
+            "generated_on": datetime.now().isoformat(),
+            "student": {
+                "interests": student.interests,
+                "skills": student.skills,
+                "preferred_topics": student.preferred_topics,
+            },
+            "matches": [
+                {
+                    "rank": match['rank'],
+                    "score": match['score'],
+                    "title": match['thesis']['Title'],
+                    "chair": match['thesis']['chair_name'],
+                    "url": match['thesis']['URL'],
+                    "analysis": match.get('structured'),
+                    "thesis": match['thesis'],
+                }
+                for match in matches
+                if match['rank'] is not None
+            ],
+            "failed": [
+                {
+                    "title": match['thesis']['Title'],
+                    "chair": match['thesis']['chair_name'],
+                    "url": match['thesis']['URL'],
+                    "error": match['error'],
+                }
+                for match in matches
+                if match['rank'] is None
+            ],
+            # Chair files that could not be parsed, so their projects are missing
+            "skipped_files": [
+                {"file": Path(error.path).name, "error": error.error}
+                for error in self.parse_errors
+            ],
+        }
+
+    def prefilter_and_analyze(self, student: StudentProfile, projects: List[Dict]) -> List[Dict]:
+        """Analyze projects, sending only the top_k most similar ones to the LLM"""
+        if self.top_k is None or len(projects) <= self.top_k:
+            return self.analyze_matches(student, projects)
+
+        similarities = self.embedding_similarities(student, projects)
+        if self.evaluate_prefilter:
+            matches = self.analyze_matches(student, projects)
+            self.save_prefilter_report(
+                self.recall_vs_cost(
+                    similarities,
+                    [match['score'] for match in matches],
+                    [5, 10, 20, 40, self.top_k],
+                )
+            )
+            return matches
+
+        candidates = self.prefilter_projects(projects, similarities)
+        print(f"Prefilter kept {len(candidates)} of {len(projects)} projects "
+              f"({len(projects) - len(candidates)} LLM calls saved)")
+        return self.analyze_matches(student, candidates)
+
+    def search_index(self, student: StudentProfile, thesis_data_dir: Path) -> List[Dict]:
+        """Refresh the opportunity index for thesis_data_dir and return the top_k projects"""
+        stats = self.index.update(thesis_data_dir)
+        print(f"Opportunity index: {stats}")
+        # The index only parses new content and remembers which files failed
+        self.parse_errors = [
+            ChairFileError(path=path, error=error)
+            for path, error in self.index.errors(thesis_data_dir).items()
+        ]
+        for error in self.parse_errors:
+            print(f"Skipped {error.path}: {error.error}")
+
+        student_vector = self.embedding_client.embed([student_profile_text(student)])[0]
+        results = self.index.search(student_vector, k=self.top_k, directory=thesis_data_dir)
+        return [project for _, project in results]
+
+    def save_prefilter_report(self, report: List[Dict]) -> Path:
+        """Print and save the recall-vs-cost table of the embedding prefilter"""
+        print("Prefilter recall vs cost:")
+        for row in report:
+            print(f"  K={row['k']:>3}: recall {row['recall']:.0%} "
+                  f"at {row['llm_calls']} LLM calls ({row['cost_fraction']:.0%} of full cost)")
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_file = self.output_dir / f"prefilter_report_{timestamp}.json"
+        with open(report_file, "w") as f:
+            json.dump(report, f, indent=4)
+        return report_file
+
     def run_matching(self, student_dir: Path, thesis_data_dir: Path) -> None:
         """Main matching process"""
         
         # Load data
+        self._report_progress("Loading data", 0, 1)
         student = self.load_student_data(student_dir)
-        print('>>>>> going to load thesis data')
-        projects = self.load_thesis_data(thesis_data_dir)
-        print('>>>>> ',len(projects))
 
-        #return student, projects
-        
-        print(f"Analyzing {len(projects)} thesis opportunities...")
-        #return student, projects
-        # Analyze matches
-        matches = []
-        for project in projects:
-            print(f"-- Analyzing match with {project['Title']}...")
-            match = self.analyze_match(student, project)
-            matches.append(match)
-            print(f"-----> Matched with {project['Title']} ({match['score']}%)")
-            #break
+        if self.index is not None and not self.evaluate_prefilter:
+            # Persistent index: no re-parse, top-K straight from stored embeddings
+            projects = self.search_index(student, thesis_data_dir)
+            print(f"Analyzing {len(projects)} thesis opportunities...")
+            matches = self.analyze_matches(student, projects)
+        else:
+            projects = self.load_thesis_data(thesis_data_dir)
+            print(f"Analyzing {len(projects)} thesis opportunities...")
+            matches = self.prefilter_and_analyze(student, projects)
 
-        #print(matches[0])
-        #return matches
-        
         # Rank matches
+        self._report_progress("Writing report", 0, 1)
         ranked_matches = self.rank_matches(matches)
         
         # Generate report
@@ -329,6 +714,11 @@ class ThesisMatchingAgent:
         
         with open(output_file, "w") as f:
             f.write(report)
+
+        with open(output_file.with_suffix(".json"), "w", encoding="utf-8") as f:
+            json.dump(self.generate_report_data(student, ranked_matches), f, indent=4)
             
         print(f"\nMatching analysis completed! Report saved to: {output_file}")
+        if self.cache is not None:
+            print(f"LLM cache: {self.cache}")
         return output_file
\ No newline at end of file
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from embeddings import EmbeddingClient, project_text, top_k_indices
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _temp_path(path: Path) -> Path:
+    """Hidden sibling of path, unique to this process and thread, for atomic replace"""
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+# One lock per index directory, shared by every OpportunityIndex of this process
+_index_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+_index_locks_guard = threading.Lock()
+
+
+class OpportunityIndex:
+    """
+    On-disk index of parsed thesis opportunities and their embeddings,
+    keyed by the SHA-256 of the chair file content.
+
+    Layout of index_dir:
+    - manifest.json: embedding model, names of the current rows and
+      embeddings files, per-content state (row range, parse error) and, per
+      chair data directory, the content hash, mtime and size of each file
+    - rows-<version>.json: one opportunity per row, grouped by content
+    - embeddings-<version>.npy: float32 matrix of L2-normalized vectors
+      aligned with the rows, memory-mapped on load
+
+    Student directories link the same chair snapshots, so content that is
+    already indexed is never parsed or embedded again; content no directory
+    refers to any more is dropped. Writers hold a per-directory lock, re-read
+    the manifest and write rows and embeddings under a new version before
+    replacing manifest.json, so readers always see matching files.
+    search() answers top-K queries with one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        embedding_client: EmbeddingClient,
+        index_dir: Union[str, Path] = "thesis_index",
+    ):
+        self.embedding_client = embedding_client
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.index_dir / "manifest.json"
+        with _index_locks_guard:
+            self._lock = _index_locks[str(self.index_dir.resolve())]
+        self.version: Optional[str] = None
+        self.directories: Dict[str, Dict[str, Dict]] = {}
+        self.contents: Dict[str, Dict] = {}
+        self.rows: List[Dict] = []
+        self.vectors = None
+        with self._lock:
+            self._load()
+
+    def _load(self) -> None:
+        """Read the manifest, and the rows and vectors if another writer replaced them"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        if manifest.get("model") != self.embedding_client.model:
+            # Vectors from another embedding model are not comparable: rebuild
+            self.version, self.directories, self.contents, self.rows, self.vectors = None, {}, {}, [], None
+            return
+        self.directories = manifest["directories"]
+        if manifest["version"] == self.version:
+            return
+
+        rows, vectors = [], None
+        if manifest["rows"] is not None:
+            try:
+                with open(self.index_dir / manifest["rows"], "r", encoding="utf-8") as f:
+                    rows = json.load(f)
+                vectors = np.load(self.index_dir / manifest["embeddings"], mmap_mode="r")
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.version, self.directories, self.contents, self.rows, self.vectors = None, {}, {}, [], None
+                return
+        self.version = manifest["version"]
+        self.contents = manifest["contents"]
+        self.rows, self.vectors = rows, vectors
+
+    def _save(self, rows_changed: bool) -> None:
+        """Write a new version; rows and embeddings files are only rewritten when rows_changed"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = {}
+
+        version = uuid.uuid4().hex[:12]
+        rows_name = previous.get("rows") if previous.get("model") == self.embedding_client.model else None
+        embeddings_name = previous.get("embeddings") if rows_name is not None else None
+        if rows_changed:
+            rows_name = embeddings_name = None
+            if self.rows:
+                rows_name, embeddings_name = f"rows-{version}.json", f"embeddings-{version}.npy"
+                with open(self.index_dir / rows_name, "w", encoding="utf-8") as f:
+                    json.dump(self.rows, f)
+                np.save(self.index_dir / embeddings_name, np.asarray(self.vectors, dtype=np.float32))
+
+        manifest = {
+            "model": self.embedding_client.model,
+            "version": version,
+            "rows": rows_name,
+            "embeddings": embeddings_name,
+            "contents": self.contents,
+            "directories": self.directories,
+        }
+        tmp_path = _temp_path(self.manifest_path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        tmp_path.replace(self.manifest_path)
+        self.version = version
+
+        # Files of the replaced version; readers that memory-mapped them keep their data
+        for name in (previous.get("rows"), previous.get("embeddings"), "metadata.json", "embeddings.npy"):
+            if name and name not in (rows_name, embeddings_name):
+                try:
+                    (self.index_dir / name).unlink()
+                except OSError:
+                    pass
+        if self.vectors is not None and embeddings_name is not None and rows_changed:
+            self.vectors = np.load(self.index_dir / embeddings_name, mmap_mode="r")
+
+    @staticmethod
+    def _file_entry(entry: Optional[Dict], path: Path) -> Dict:
+        """Cheap mtime/size check first, content hash only when those differ"""
+        stat = path.stat()
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return entry
+        return {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": file_sha256(path)}
+
+    def update(self, thesis_data_dir: Path) -> Dict[str, int]:
+        """Bring the index up to date with the chair files in thesis_data_dir"""
+        # Imported here to avoid a circular import with matching_agent
+        from matching_agent import parse_chair_files
+
+        thesis_data_dir = Path(thesis_data_dir)
+        directory = str(thesis_data_dir.resolve())
+        stats = {"unchanged": 0, "reused": 0, "updated": 0, "removed": 0, "failed": 0}
+
+        with self._lock:
+            self._load()
+            old_files = self.directories.get(directory, {})
+            files = {
+                path.name: self._file_entry(old_files.get(path.name), path)
+                for path in sorted(thesis_data_dir.glob("*.txt"))
+            }
+            stats["removed"] = len(old_files.keys() - files.keys())
+
+            # Parse and embed only content that no directory has indexed yet
+            to_parse: Dict[str, str] = {}
+            for name, entry in files.items():
+                sha256 = entry["sha256"]
+                if sha256 in self.contents or sha256 in to_parse:
+                    same = old_files.get(name, {}).get("sha256") == sha256
+                    stats["unchanged" if same else "reused"] += 1
+                else:
+                    to_parse[sha256] = name
+
+            new_contents: Dict[str, Dict] = {}
+            new_rows: List[Dict] = []
+            parsed = parse_chair_files([thesis_data_dir / name for name in to_parse.values()])
+            for sha256, (opportunities, error) in zip(to_parse, parsed):
+                if error is not None:
+                    new_contents[sha256] = {"count": 0, "error": error}
+                    stats["failed"] += 1
+                else:
+                    new_contents[sha256] = {"count": len(opportunities), "error": None}
+                    new_rows.extend(opportunities)
+                    stats["updated"] += 1
+
+            directories = {key: value for key, value in self.directories.items() if key != directory}
+            if files:
+                directories[directory] = files
+            referenced = {entry["sha256"] for entries in directories.values() for entry in entries.values()}
+            dropped = self.contents.keys() - referenced
+
+            if files == old_files and not new_contents and not dropped:
+                return stats
+            self.directories = directories
+            if not new_contents and not dropped:
+                # Only this directory's file list or mtimes changed
+                self._save(rows_changed=False)
+                return stats
+
+            # Keep the stored vectors of content that is still referenced
+            contents: Dict[str, Dict] = {}
+            kept: List[np.ndarray] = []
+            start = 0
+            for sha256, content in self.contents.items():
+                if sha256 in dropped:
+                    continue
+                kept.append(np.arange(content["start"], content["start"] + content["count"]))
+                contents[sha256] = {**content, "start": start}
+                start += content["count"]
+            kept_rows = np.concatenate(kept) if kept else np.zeros(0, dtype=np.int64)
+            for sha256, content in new_contents.items():
+                contents[sha256] = {**content, "start": start}
+                start += content["count"]
+
+            parts = []
+            if len(kept_rows):
+                parts.append(np.asarray(self.vectors[kept_rows], dtype=np.float32))
+            if new_rows:
+                embedded = self.embedding_client.embed([project_text(row) for row in new_rows])
+                parts.append(embedded / np.maximum(np.linalg.norm(embedded, axis=1, keepdims=True), 1e-12))
+
+            self.contents = contents
+            self.rows = [self.rows[i] for i in kept_rows] + new_rows
+            self.vectors = np.vstack(parts) if parts else None
+            self._save(rows_changed=True)
+        return stats
+
+    def _directory_rows(self, directory: Path) -> np.ndarray:
+        """Row indices of the opportunities of the files in directory, in file order"""
+        entries = self.directories.get(str(Path(directory).resolve()), {})
+        hashes = dict.fromkeys(entries[name]["sha256"] for name in sorted(entries))
+        contents = [self.contents[sha256] for sha256 in hashes]
+        ranges = [np.arange(c["start"], c["start"] + c["count"]) for c in contents if c["count"]]
+        return np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.int64)
+
+    def projects(self, directory: Path) -> List[Dict]:
+        """Indexed opportunities of the files in directory, in file order"""
+        with self._lock:
+            return [self.rows[i] for i in self._directory_rows(directory)]
+
+    def search(
+        self, query: np.ndarray, k: Optional[int] = None, directory: Optional[Path] = None
+    ) -> List[Tuple[float, Dict]]:
+        """Top-k (similarity, opportunity) pairs, optionally restricted to one directory"""
+        with self._lock:
+            if self.vectors is None or not self.rows:
+                return []
+            rows = np.arange(len(self.rows)) if directory is None else self._directory_rows(directory)
+            if len(rows) == 0:
+                return []
+            vectors = self.vectors if directory is None else self.vectors[rows]
+            opportunities = self.rows
+
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        # Stored vectors are normalized, so the dot product is the cosine similarity
+        similarities = vectors @ query
+        best = top_k_indices(similarities, len(rows) if k is None else k)
+        return [(float(similarities[i]), opportunities[rows[i]]) for i in best]
+
+    def errors(self, directory: Optional[Path] = None) -> Dict[str, str]:
+        """Chair files that could not be parsed, with the reason, optionally of one directory"""
+        with self._lock:
+            directories = self.directories
+            if directory is not None:
+                key = str(Path(directory).resolve())
+                directories = {key: directories.get(key, {})}
+            return {
+                str(Path(key) / name): self.contents[entry["sha256"]]["error"]
+                for key, entries in directories.items()
+                for name, entry in entries.items()
+                if self.contents.get(entry["sha256"], {}).get("error")
+            }
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+from http_client import AsyncHTTPClient, HTTPClient, get_async_http_client, get_http_client
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as the page store key (lowercase host, no fragment)"""
+    parts = urlsplit(url.strip())
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+@dataclass
+class Page:
+    url: str
+    links: List[Tuple[str, str]] = field(default_factory=list)  # (link text, absolute url)
+    text: str = ""
+
+
+def parse_page(url: str, html: str) -> Page:
+    """Parse html once and derive both the link list and the cleaned text"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    links = []
+    for link in soup.find_all('a', href=True):
+        link_text = link.get_text().strip()
+        if link_text:  # Only include links with text
+            # Convert relative URLs to absolute URLs
+            links.append((link_text, urljoin(url, link['href'])))
+
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    # Clean up whitespace
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+
+    return Page(url=url, links=links, text=text)
+
+
+class PageStore:
+    """
+    Per-run store of fetched and parsed pages, keyed by normalized URL.
+
+    Both scraping tools read from the same store, so a page is downloaded and
+    parsed at most once per run no matter how often the agent asks for it.
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[HTTPClient] = None,
+        async_http_client: Optional[AsyncHTTPClient] = None,
+    ):
+        self.http_client = http_client
+        self.async_http_client = async_http_client
+        self._pages: Dict[str, Page] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.fetches = 0
+
+    def get(self, url: str) -> Page:
+        """Return the parsed page for url, fetching it on first use"""
+        key = normalize_url(url)
+        with self._lock:
+            self.lookups += 1
+            page = self._pages.get(key)
+            if page is not None:
+                return page
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        # Concurrent requests for the same URL wait for a single fetch
+        with key_lock:
+            page = self._pages.get(key)
+            if page is not None:
+                return page
+            with self._lock:
+                self.fetches += 1
+            client = self.http_client or get_http_client()
+            response = client.get(url)
+            page = parse_page(url, response.text)
+            with self._lock:
+                self._pages[key] = page
+            return page
+
+    async def aget(self, url: str) -> Page:
+        """Async counterpart of get; concurrent callers share one in-flight fetch"""
+        key = normalize_url(url)
+        with self._lock:
+            self.lookups += 1
+            page = self._pages.get(key)
+        if page is not None:
+            return page
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            with self._lock:
+                self.fetches += 1
+            client = self.async_http_client or get_async_http_client()
+            response = await client.get(url)
+            # Parsing is CPU-bound; keep it off the event loop
+            page = await asyncio.to_thread(parse_page, url, response.text)
+            with self._lock:
+                self._pages[key] = page
+            future.set_result(page)
+            return page
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else awaited it
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    @property
+    def duplicate_fetches_saved(self) -> int:
+        return self.lookups - self.fetches
+
+    def report(self) -> str:
+        return (
+            f"PageStore: {self.lookups} page requests, {self.fetches} fetched, "
+            f"{self.duplicate_fetches_saved} duplicate fetches saved"
+        )
+
+    def clear(self) -> None:
+        """Forget all pages and reset counters, e.g. between runs"""
+        with self._lock:
+            self._pages.clear()
+            self._locks.clear()
+            self._pending.clear()
+            self.lookups = 0
+            self.fetches = 0
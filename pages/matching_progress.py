@@ -1,58 +1,89 @@
 # pages/matching_progress.py
 import streamlit as st
-import time
-import json
-import random
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Optional
 from scrapping_agent import create_thesis_opportunities_agent
+from thesis_crawler import ThesisCrawler
+from chairs import DEFAULT_CHAIRS, load_chairs_data, sample_chairs
+from prefetch import get_prefetcher
+from chair_snapshots import get_snapshot_store
+from matching_agent import parse_chair_data
 from prompts import get_chair_scrapping_prompt
 
 class MatchingProgress:
-    def __init__(self, openai_api_key: str):
-        # Load chairs data
-        with open('chairs_data.json', 'r') as f:
-            chairs_dict = json.load(f)
-            
-        # Filter out non-chair entries and get random sample
-        self.chairs_data = {
-            k: v for k, v in chairs_dict.items() 
-            if k in ['Quantum Computing', 'Theoretical Foundations of Artificial Intelligence', 'Information Systems and Business Process Management']
-        }
+    def __init__(
+        self,
+        openai_api_key: str,
+        student_id: str,
+        num_chairs: Optional[int] = None,
+        max_workers: int = 4,
+        chair_names: Optional[List[str]] = None,
+        scrape_mode: str = "crawler",
+    ):
+        if scrape_mode not in ("crawler", "agent"):
+            raise ValueError("scrape_mode must be 'crawler' or 'agent'")
+        self.openai_api_key = openai_api_key
+        # "crawler": keyword-guided BFS + one LLM call, "agent": ReAct LangChain agent
+        self.scrape_mode = scrape_mode
+        # Captured here because worker threads cannot read st.session_state
+        self.student_id = student_id
+        self.max_workers = max(1, max_workers)
 
-        self.selected_chairs = random.sample(list(self.chairs_data.keys()), 2)
-        
-        # Initialize agents
-        self.scraping_agent = create_thesis_opportunities_agent(openai_api_key)
-        
-        # Create directory for scraped data if it doesn't exist
-        self.thesis_data_dir = Path("thesis_data")
-        self.thesis_data_dir.mkdir(exist_ok=True)
+        # chair_names=None sweeps every chair in chairs_data.json; num_chairs=None scrapes all of them
+        self.chairs_data = load_chairs_data(chair_names)
+        self.selected_chairs = sample_chairs(list(self.chairs_data.keys()), num_chairs)
 
     def scrape_chair(self, chair_name: str, url: str) -> dict:
-        """Scrape thesis opportunities from a chair's website"""
+        """Scrape thesis opportunities from a chair's website, reusing a fresh shared snapshot"""
+        snapshots = get_snapshot_store()
         try:
-            prompt = get_chair_scrapping_prompt(url)
-            result = self.scraping_agent.run(prompt)
-            
-            # Save the scraped data
-            chair_file = self.thesis_data_dir / f"{chair_name.lower().replace(' ', '_')}.txt"
-            with open(chair_file, 'w', encoding='utf-8') as f:
-                f.write(result)
+            # One scrape per chair within the freshness window, shared by all students
+            with snapshots.chair_lock(chair_name):
+                snapshot = snapshots.fresh(chair_name)
+                if snapshot is None:
+                    content = self._scrape(chair_name, url)
+                    # A bad scrape fails this run only; it is never shared as a snapshot
+                    self.validate_scrape(content)
+                    snapshot = snapshots.put(chair_name, url, content)
+                    removed = snapshots.prune()
+                    if removed:
+                        print(f"Pruned {removed} unreferenced chair snapshot(s)")
+                else:
+                    print(f"{chair_name}: reusing snapshot {snapshot.sha256[:12]} "
+                          f"from {datetime.fromtimestamp(snapshot.scraped_at):%Y-%m-%d %H:%M}")
 
-            # Also save to student-specific directory for tracking
-            student_thesis_dir = Path(f"thesis_data/{st.session_state.student_id}")
-            student_thesis_dir.mkdir(parents=True, exist_ok=True)
-            
-            file_name = f"opp_{chair_name.lower().replace(' ', '_')}.txt"
-            student_chair_file = student_thesis_dir / file_name
-            with open(student_chair_file, 'a', encoding='utf-8') as f:
-                f.write(result)
-
-
-            return {"success": True, "data": result}
+            # Per-student reference replaces the previous one instead of appending to it
+            snapshots.link(self.student_id, snapshot)
+            return {"success": True, "data": snapshot.read()}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @staticmethod
+    def validate_scrape(content: Optional[str]) -> None:
+        """
+        Raise ValueError unless content holds at least one parseable thesis
+        opportunity, e.g. for "Agent stopped due to iteration limit or time limit."
+        """
+        if not content or not content.strip():
+            raise ValueError("Scrape returned no content")
+        _, opportunities = parse_chair_data(content)
+        if not opportunities:
+            raise ValueError("Scrape found no thesis opportunities")
+
+    def _scrape(self, chair_name: str, url: str) -> str:
+        # Each scrape gets its own agent and page store so chairs can run in parallel;
+        # the page store may already be warm from the speculative prefetch
+        page_store = get_prefetcher().take_page_store(url)
+        if self.scrape_mode == "crawler":
+            result = ThesisCrawler(self.openai_api_key, page_store=page_store).run(url)
+        else:
+            scraping_agent = create_thesis_opportunities_agent(self.openai_api_key, page_store=page_store)
+            prompt = get_chair_scrapping_prompt(url)
+            result = scraping_agent.run(prompt)
+        print(f"{chair_name}: {page_store.report()}")
+        return result
+
     def run(self):
         st.title("🔍 Matching Your Profile")
         
@@ -69,37 +100,42 @@ class MatchingProgress:
             
             successful_scrapes = []
             processed_chairs = []
-            
-            for i, chair in enumerate(self.selected_chairs):
-                # Update progress
-                progress = (i + 1) / len(self.selected_chairs)
-                progress_bar.progress(progress)
-                
-                # Get chair URL
-                chair_url = self.chairs_data[chair]["link"]
-                chair_professor = self.chairs_data[chair]["professor"]
-                
-                # Update status
-                status.markdown(f"""### 🔄 Processing: {chair}
-                Professor: {chair_professor}
-                URL: {chair_url}""")
-                
-                # Scrape chair data
-                result = self.scrape_chair(chair, chair_url)
-                
-                if result["success"]:
-                    successful_scrapes.append(chair)
-                
-                processed_chairs.append(chair)
-                chairs_list.markdown("### Processed Chairs:\n" + "\n".join([
-                    f"✓ {c} {'✅' if c in successful_scrapes else '❌'}" 
-                    for c in processed_chairs
-                ]))
-                
-                matches.markdown(f"### 🎯 Successful Scrapes: {len(successful_scrapes)}")
-                
-                # Add some delay for visual effect
-                time.sleep(1)
+            total = len(self.selected_chairs)
+
+            status.markdown(
+                f"### 🔄 Processing {total} chairs ({min(self.max_workers, total)} in parallel)\n"
+                + "\n".join(
+                    f"- {chair} ({self.chairs_data[chair]['professor']})"
+                    for chair in self.selected_chairs
+                )
+            )
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self.scrape_chair, chair, self.chairs_data[chair]["link"]): chair
+                    for chair in self.selected_chairs
+                }
+
+                # Update the widgets as each chair finishes, in completion order
+                for future in as_completed(futures):
+                    chair = futures[future]
+                    result = future.result()
+
+                    if result["success"]:
+                        successful_scrapes.append(chair)
+                    else:
+                        print(f"Scraping {chair} failed: {result['error']}")
+
+                    processed_chairs.append(chair)
+                    progress_bar.progress(len(processed_chairs) / total)
+                    chairs_list.markdown("### Processed Chairs:\n" + "\n".join([
+                        f"✓ {c} {'✅' if c in successful_scrapes else '❌'}" 
+                        for c in processed_chairs
+                    ]))
+                    
+                    matches.markdown(f"### 🎯 Successful Scrapes: {len(successful_scrapes)}")
+
+            status.empty()
             
             # Final success message
             st.success(f"""
@@ -115,8 +151,6 @@ class MatchingProgress:
             # Save processed chairs to session state for the matching phase
             st.session_state.processed_chairs = successful_scrapes
             
-            # Brief delay before redirect
-            time.sleep(3)
             st.switch_page("pages/show_report.py")
 
 def init_session_state():
@@ -127,6 +161,21 @@ def init_session_state():
         st.session_state.processed_chairs = []
     if 'openai_api_key' not in st.session_state:
         st.session_state.openai_api_key = None
+    # Matching settings, normally chosen in the sidebar of the chat page
+    if 'chair_names' not in st.session_state:
+        # None considers every chair in chairs_data.json
+        st.session_state.chair_names = list(DEFAULT_CHAIRS)
+    if 'num_chairs' not in st.session_state:
+        # None scrapes every considered chair
+        st.session_state.num_chairs = 2
+    if 'max_scrape_workers' not in st.session_state:
+        st.session_state.max_scrape_workers = 4
+    if 'scrape_mode' not in st.session_state:
+        st.session_state.scrape_mode = "crawler"
+    if 'selected_chairs' not in st.session_state:
+        st.session_state.selected_chairs = sample_chairs(
+            list(load_chairs_data(st.session_state.chair_names)), st.session_state.num_chairs
+        )
 
 if __name__ == "__main__":
     # Page config
@@ -149,5 +198,12 @@ if __name__ == "__main__":
         if st.button("Return to Setup"):
             st.switch_page("Home.py")
     else:
-        progress = MatchingProgress(st.session_state.openai_api_key)
+        progress = MatchingProgress(
+            st.session_state.openai_api_key,
+            st.session_state.student_id,
+            # Already sampled, so the chairs prefetched during the chat are the ones scraped
+            chair_names=st.session_state.selected_chairs,
+            max_workers=st.session_state.max_scrape_workers,
+            scrape_mode=st.session_state.scrape_mode,
+        )
         progress.run()
\ No newline at end of file
@@ -1,7 +1,14 @@
 # pages/show_report.py
 import streamlit as st
+import json
+import os
 from pathlib import Path
+from typing import Dict, List, Optional
 from matching_agent import ThesisMatchingAgent
+from llm_cache import LLMCache
+from opportunity_index import OpportunityIndex
+from embeddings import EmbeddingClient
+from job_runner import DONE, FAILED, Job, JobContext, JobRunner, JobStore
 import time
 from datetime import datetime
 
@@ -17,85 +24,75 @@ def init_session_state():
         st.session_state.matching_complete = False
     if 'report_path' not in st.session_state:
         st.session_state.report_path = None
+    if 'matching_job_id' not in st.session_state:
+        st.session_state.matching_job_id = None
+    if 'match_top_k' not in st.session_state:
+        # Number of projects sent to the LLM after the embedding prefilter
+        st.session_state.match_top_k = 20
+    if 'match_scoring_mode' not in st.session_state:
+        # "batched" scores several projects per request, "per_project" one request each
+        st.session_state.match_scoring_mode = "batched"
+
+@st.cache_data(show_spinner=False)
+def load_report_model(report_path: str, mtime: float) -> Dict:
+    """
+    Parse a matching report once per (path, mtime) into the model rendered by
+    display_matching_report. A new report file has a new mtime, so stale
+    entries are never served. Reports written before the JSON companion
+    file existed come back as {"legacy": True, "text": ...}.
+    """
+    report_path = Path(report_path)
+    json_path = report_path.with_suffix(".json")
+    if json_path.exists():
+        with open(json_path, 'r', encoding='utf-8') as f:
+            report_data = json.load(f)
+    else:
+        report_data = {"legacy": True}
+    with open(report_path, 'r') as f:
+        report_data["text"] = f.read()
+    return report_data
+
+def legacy_report_markdown(text: str) -> str:
+    """Markdown of a plain-text report: one paragraph per line, dashed lines as rules"""
+    blocks = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        blocks.append("---" if set(line) == {"-"} else line)
+    return "\n\n".join(blocks)
+
+def match_details_markdown(analysis: Optional[Dict]) -> List[str]:
+    """Markdown blocks of the analysis sections of one match"""
+    if not analysis:
+        return ["No detailed analysis available for this match."]
+    blocks = []
+    for title, items in [
+        ("Key Strengths", analysis["strengths"]),
+        ("Potential Gaps", analysis["gaps"]),
+        ("Recommendations", analysis["recommendations"]),
+    ]:
+        if items:
+            blocks.append(f"### {title}")
+            blocks.append('\n'.join(f"- {item}" for item in items))
+    if analysis["analysis"]:
+        blocks.append("### Detailed Analysis")
+        blocks.append(analysis["analysis"])
+    return blocks
 
 def display_matching_report(report_path: Path) -> None:
-    """Display the matching report with proper markdown structure"""
+    """Display the matching report from its JSON companion file, or its text if there is none"""
     try:
-        with open(report_path, 'r') as f:
-            report_content = f.read()
-        
-        # Split into profile and matches
-        main_sections = report_content.split("TOP THESIS MATCHES")
-        
-        # Display student profile
-        profile_lines = [line.strip() for line in main_sections[0].split('\n') if line.strip()]
-        with st.expander("📋 Student Profile", expanded=True):
-            for line in profile_lines:
-                if ':' in line and not line.startswith('Generated'):
-                    key, value = line.split(':', 1)
-                    if not any(x in key for x in ['SUMMARY', '---']):
-                        st.markdown(f"**{key.strip()}:** {value.strip()}")
+        json_path = report_path.with_suffix(".json")
+        report_data = load_report_model(
+            str(report_path), (json_path if json_path.exists() else report_path).stat().st_mtime
+        )
 
-        # Display matches header
-        st.markdown("## 🎯 Top Thesis Matches")
-        
-        # Split and process each match
-        matches = main_sections[1].split("--------------------------------------------------------------------------------")
-        
-        for match in matches:
-            if not match.strip():
-                continue
-            
-            # Split match content into lines
-            lines = [line.strip() for line in match.split('\n') if line.strip()]
-            
-            # Extract title and score
-            title_line = next((line for line in lines if line.startswith(('1.', '2.', '3.', '4.', '5.'))), None)
-            if not title_line:
-                continue
-                
-            title = title_line.split('.', 1)[1].split('(')[0].strip()
-            score = title_line.split('(')[1].split('%')[0].strip()
-            
-            # Create match expander
-            with st.expander(f"### {title} - {score[-2:]}%", expanded=False):
-                # Header section with score and chair
-                col1, col2 = st.columns([2,1])
-                with col1:
-                    chair_line = next(line for line in lines if line.startswith('Chair:'))
-                    st.markdown(f"**{chair_line}**")
-                with col2:
-                    st.markdown(f"""
-                        <div class='score-box'>
-                            <h3>{score[-2:]}% Match</h3>
-                        </div>
-                    """, unsafe_allow_html=True)                
-                st.markdown("---")
-                
-                # Process main sections
-                current_section = None
-                section_content = []
-                
-                for line in lines:
-                    if line.startswith(('2.', '3.', '4.', '5.')):  # Main section headers
-                        # Output previous section if exists
-                        if current_section and section_content:
-                            st.markdown(f"### {current_section}")
-                            st.markdown('\n'.join(section_content))
-                        # Start new section
-                        current_section = line.split(':', 1)[0].strip('12345. ')
-                        section_content = []
-                    elif line.startswith('**') or line.startswith('-'):  # Subsections and bullet points
-                        section_content.append(line)
-                    elif line.startswith('Analysis:') or line.startswith('1. Match'):
-                        continue
-                    elif line and not line.startswith('Chair:') and not line.startswith('URL:'):
-                        section_content.append(line)
-                
-                # Output last section
-                if current_section and section_content:
-                    st.markdown(f"### {current_section}")
-                    st.markdown('\n'.join(section_content))
+        if report_data.get("legacy"):
+            st.info("This report was generated before structured reports; showing its text version.")
+            st.markdown(legacy_report_markdown(report_data["text"]))
+        else:
+            display_report_model(report_data, report_id=report_path.stem)
 
         # Add download button
         st.markdown("---")
@@ -103,7 +100,7 @@ def display_matching_report(report_path: Path) -> None:
         with col2:
             st.download_button(
                 label="📥 Download Complete Report",
-                data=report_content,
+                data=report_data["text"],
                 file_name=f"thesis_matching_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
                 mime="text/plain",
                 use_container_width=True
@@ -112,6 +109,55 @@ def display_matching_report(report_path: Path) -> None:
     except Exception as e:
         st.error(f"Error displaying report: {str(e)}")
 
+def display_report_model(report_data: Dict, report_id: str) -> None:
+    """Render the student profile, the top matches, the failed analyses and skipped files of a report"""
+    # Display student profile
+    student = report_data["student"]
+    with st.expander("📋 Student Profile", expanded=True):
+        st.markdown(f"**Interests:** {', '.join(student['interests'])}")
+        st.markdown(f"**Skills:** {', '.join(student['skills'])}")
+        st.markdown(f"**Preferred Topics:** {', '.join(student['preferred_topics'])}")
+
+    # Display matches header
+    st.markdown("## 🎯 Top Thesis Matches")
+    
+    for i, match in enumerate(report_data["matches"][:5]):
+        # Details are only built for matches the student opens; keys are per
+        # report so a newly generated report starts with every match closed
+        if not st.toggle(f"**{match['title']}** - {match['score']}%", key=f"match_open_{report_id}_{i}"):
+            continue
+        with st.container(border=True):
+            # Header section with score and chair
+            col1, col2 = st.columns([2,1])
+            with col1:
+                st.markdown(f"**Chair: {match['chair']}**")
+                if match['url']:
+                    st.markdown(f"**URL:** {match['url']}")
+            with col2:
+                st.markdown(f"""
+                    <div class='score-box'>
+                        <h3>{match['score']}% Match</h3>
+                    </div>
+                """, unsafe_allow_html=True)                
+            st.markdown("---")
+
+            for block in match_details_markdown(match["analysis"]):
+                st.markdown(block)
+
+    # Failed analyses are listed apart instead of being ranked as 0% matches
+    failed = report_data.get("failed", [])
+    if failed:
+        st.markdown("## ⚠️ Could Not Be Analysed")
+        st.markdown('\n'.join(
+            f"- **{match['title']}** ({match['chair']}): {match['error']}" for match in failed
+        ))
+
+    skipped = report_data.get("skipped_files", [])
+    if skipped:
+        st.markdown("## ⚠️ Skipped Chair Files")
+        st.caption("These chair files could not be read, so their projects are not part of the report.")
+        st.markdown('\n'.join(f"- **{error['file']}**: {error['error']}" for error in skipped))
+
 # Add this styling to your main function
 def apply_custom_styles():
     st.markdown("""
@@ -219,35 +265,103 @@ def apply_custom_styles():
     """, unsafe_allow_html=True)
 
 
-def generate_matching_report():
-    """Generate the matching report using the ThesisMatchingAgent"""
-    try:
-        with st.spinner("🔄 Generating final matching report..."):
-            # Create paths
-            student_dir = Path(f"student_data/{st.session_state.student_id}")
-            thesis_data_dir = Path(f"thesis_data/{st.session_state.student_id}")
-            print(student_dir, thesis_data_dir)
-            # Initialize matcher
-            matcher = ThesisMatchingAgent(st.session_state.openai_api_key)
-            
-            # Run matching
-            result_path = matcher.run_matching(student_dir, thesis_data_dir)
-            
-            # Store report path in session state
-            st.session_state.report_path = result_path
-            st.session_state.matching_complete = True
-            
-            return True
-            
-    except Exception as e:
-        st.error(f"Error generating report: {str(e)}")
-        return False
+# Overall progress range of each matching stage, for one progress bar across stages
+MATCHING_STAGES = {
+    "Loading data": (0.0, 0.1),
+    "Analyzing matches": (0.1, 0.9),
+    "Scoring projects": (0.1, 0.6),
+    "Writing detailed analyses": (0.6, 0.9),
+    "Writing report": (0.9, 1.0),
+}
+
+def run_matching_job(context: JobContext) -> Dict:
+    """Background job: run the matching pipeline for one student and return the report path"""
+    student_id = context.params["student_id"]
+    if context.partial:
+        print(f"Resuming matching job {context.job_id} from '{context.partial['stage']}'")
+
+    def on_progress(stage: str, done: int, total: int) -> None:
+        start, end = MATCHING_STAGES.get(stage, (0.0, 1.0))
+        context.report_progress(start + (end - start) * done / max(total, 1), f"{stage} ({done}/{total})")
+        if done == 0:
+            context.save_partial({"stage": stage})
+
+    # Completed LLM calls are persisted in the LLMCache as they finish, so a
+    # resumed job only pays for the analyses that were still outstanding
+    # Read from the environment: API keys are never written to the job table
+    openai_api_key = os.environ.get("OPENAI_API_KEY")
+    matcher = ThesisMatchingAgent(
+        openai_api_key,
+        cache=LLMCache(),
+        top_k=context.params["top_k"],
+        index=OpportunityIndex(EmbeddingClient(openai_api_key)),
+        scoring_mode=context.params["scoring_mode"],
+        progress_callback=on_progress,
+    )
+    result_path = matcher.run_matching(
+        Path(f"student_data/{student_id}"),
+        Path(f"thesis_data/{student_id}"),
+    )
+    return {"report_path": str(result_path)}
+
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """Process-wide job runner; jobs keep running across reruns and browser refreshes"""
+    runner = JobRunner(JobStore())
+    runner.register("matching", run_matching_job)
+    runner.resume_interrupted()
+    return runner
+
+def generate_matching_report() -> Optional[Job]:
+    """Start (or attach to) the background matching job of this student and poll its state"""
+    runner = get_job_runner()
+    job = runner.get(st.session_state.matching_job_id) if st.session_state.matching_job_id else None
+    if job is None:
+        job = runner.submit(
+            "matching",
+            {
+                "student_id": st.session_state.student_id,
+                "top_k": st.session_state.match_top_k,
+                "scoring_mode": st.session_state.match_scoring_mode,
+            },
+            key=st.session_state.student_id,
+        )
+        st.session_state.matching_job_id = job.id
+
+    if job.status == DONE:
+        st.session_state.report_path = job.result["report_path"]
+        st.session_state.matching_complete = True
+    elif job.status == FAILED:
+        st.error(f"Error generating report: {job.error}")
+        if st.button("Retry"):
+            runner.resume(job.id)
+            st.rerun()
+    else:
+        st.progress(job.progress, text=job.message or "Waiting for a free worker...")
+    return job
+
+def restore_from_url() -> None:
+    """
+    A browser refresh starts a new session, so the student id is kept in the
+    page URL and used to re-attach to the student's latest matching job.
+    """
+    if st.session_state.student_id:
+        st.query_params["student_id"] = st.session_state.student_id
+        return
+    student_id = st.query_params.get("student_id")
+    if not student_id:
+        return
+    st.session_state.student_id = student_id
+    job = get_job_runner().store.latest("matching", student_id)
+    if job is not None:
+        st.session_state.matching_job_id = job.id
 
 def main():
     
     # Page config
     st.set_page_config(page_title="Thesis Matches", page_icon="🎯", layout="wide")
     init_session_state()
+    restore_from_url()
     apply_custom_styles()    
     
     # Verify prerequisites
@@ -257,7 +371,8 @@ def main():
             st.switch_page("Home.py")
         st.stop()
     
-    if not st.session_state.processed_chairs:
+    # A job found after a refresh does not need this session's chair list
+    if not st.session_state.processed_chairs and not st.session_state.matching_job_id:
         st.error("No chair data available! Please complete the matching process.")
         if st.button("Return to Matching"):
             st.switch_page("pages/matching_progress.py")
@@ -266,10 +381,15 @@ def main():
     # Generate or display report
     if not st.session_state.matching_complete:
         st.title("🎯 Generating Your Thesis Matches")
-        if generate_matching_report():
+        job = generate_matching_report()
+        if job.status == DONE:
             st.success("Report generated successfully!")
             time.sleep(1)
             st.rerun()
+        elif job.status != FAILED:
+            # Poll the job state; the work itself runs on the job runner's threads
+            time.sleep(1)
+            st.rerun()
     else:
         st.title("🎯 Your Thesis Matches")
 
@@ -279,6 +399,7 @@ def main():
             st.error("Report not found! Please try generating it again.")
             if st.button("Regenerate Report"):
                 st.session_state.matching_complete = False
+                st.session_state.matching_job_id = None
                 st.rerun()
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+def _pypdfium2_page_count(path: str) -> int:
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pypdfium2_pages(path: str, start: int, stop: int) -> List[str]:
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        texts = []
+        for i in range(start, stop):
+            page = pdf[i]
+            text_page = page.get_textpage()
+            texts.append(text_page.get_text_range())
+            text_page.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
+
+
+def _pdfminer_page_count(path: str) -> int:
+    from pdfminer.pdfpage import PDFPage
+    with open(path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def _pdfminer_pages(path: str, start: int, stop: int) -> List[str]:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    # One pass over the document; extract_text(page_numbers=[i]) would re-parse it for every page
+    return [
+        "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+        for page in extract_pages(path, page_numbers=range(start, stop))
+    ]
+
+
+def _pypdf2_page_count(path: str) -> int:
+    import PyPDF2
+    with open(path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def _pypdf2_pages(path: str, start: int, stop: int) -> List[str]:
+    import PyPDF2
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+# name -> (page count, extract pages [start, stop)), in order of preference
+BACKENDS: Dict[str, Tuple[Callable[[str], int], Callable[[str, int, int], List[str]]]] = {
+    "pypdfium2": (_pypdfium2_page_count, _pypdfium2_pages),
+    "pdfminer": (_pdfminer_page_count, _pdfminer_pages),
+    "pypdf2": (_pypdf2_page_count, _pypdf2_pages),
+}
+
+BACKEND_MODULES = {"pypdfium2": "pypdfium2", "pdfminer": "pdfminer", "pypdf2": "PyPDF2"}
+
+
+def available_backends() -> List[str]:
+    """Installed extraction backends, fastest first"""
+    available = []
+    for name in BACKENDS:
+        try:
+            __import__(BACKEND_MODULES[name])
+            available.append(name)
+        except ImportError:
+            continue
+    return available
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFTextExtractor:
+    """
+    PDF text extraction with pluggable backends.
+
+    Documents with at least parallel_threshold pages are split into page
+    ranges extracted in a process pool. Extracted text is cached on disk,
+    keyed by the SHA-256 of the file content and the backend name.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        cache_dir: Optional[Union[str, Path]] = "cache/pdf_text",
+        parallel_threshold: int = 16,
+        max_workers: Optional[int] = None,
+    ):
+        if backend is None:
+            installed = available_backends()
+            if not installed:
+                raise ImportError("No PDF backend installed: install pypdfium2, pdfminer.six or PyPDF2")
+            backend = installed[0]
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend '{backend}', choose from {list(BACKENDS)}")
+        self.backend = backend
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def extract_pages(self, pdf_path: Union[str, Path]) -> List[str]:
+        """Text of every page, in page order"""
+        path = str(pdf_path)
+        page_count, extract = BACKENDS[self.backend]
+        total = page_count(path)
+        workers = min(self.max_workers, total)
+        if total < self.parallel_threshold or workers <= 1:
+            return extract(path, 0, total)
+
+        chunk = -(-total // workers)  # ceil division
+        ranges = [(start, min(start + chunk, total)) for start in range(0, total, chunk)]
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            parts = executor.map(extract, [path] * len(ranges), *zip(*ranges))
+            return [text for part in parts for text in part]
+
+    def iter_pages(self, pdf_path: Union[str, Path]) -> Iterator[str]:
+        """Page texts one at a time, served from the cache when possible"""
+        cache_path = self._cache_path(pdf_path)
+        cached = self._cached_pages(cache_path)
+        if cached is not None:
+            yield from cached
+            return
+
+        pages = []
+        for page in self.extract_pages(pdf_path):
+            # Form feeds separate pages in the cache file; some backends end
+            # pages with one, so they become newlines to keep the split exact
+            page = page.replace("\f", "\n")
+            pages.append(page)
+            yield page
+        # Cached once iteration completes, so a partial read is never stored
+        self._store_pages(cache_path, pages)
+
+    def extract_text(self, pdf_path: Union[str, Path]) -> str:
+        """Full document text; pages are joined once with newlines"""
+        return "\n".join(self.iter_pages(pdf_path))
+
+    def _cache_path(self, pdf_path: Union[str, Path]) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{file_sha256(pdf_path)}_{self.backend}.txt"
+
+    @staticmethod
+    def _cached_pages(cache_path: Optional[Path]) -> Optional[List[str]]:
+        if cache_path is None or not cache_path.exists():
+            return None
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read().split("\f")
+
+    @staticmethod
+    def _store_pages(cache_path: Optional[Path], pages: List[str]) -> None:
+        if cache_path is None:
+            return
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\f".join(pages))
+        tmp_path.replace(cache_path)
@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from chair_snapshots import get_snapshot_store
+from embeddings import EmbeddingClient, student_profile_text
+from page_store import PageStore
+from profile_store import StudentProfile
+from thesis_crawler import ThesisCrawler
+
+
+@dataclass
+class WarmChair:
+    """A chair website being crawled ahead of time"""
+    page_store: PageStore
+    future: Future
+    created_at: float = field(default_factory=time.time)
+
+
+class SpeculativePrefetcher:
+    """
+    Starts work the matching phase will most likely need while the student is
+    still answering questions.
+
+    - warm_chairs() crawls the candidate chair websites (no LLM call) into one
+      PageStore per chair, which scrape_chair later takes over instead of
+      fetching the pages again.
+    - precompute_embedding() embeds the student profile; EmbeddingClient's
+      memo serves the vector to the matcher if the profile does not change.
+
+    Warmed pages older than ttl (the snapshot store's freshness window by
+    default) are dropped, whether or not a scrape took them over.
+
+    Everything is best effort: failures are printed and the regular path
+    simply does the work itself.
+    """
+
+    def __init__(self, max_workers: int = 3, ttl: Optional[float] = None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.ttl = ttl if ttl is not None else get_snapshot_store().ttl
+        self._lock = threading.Lock()
+        self._chairs: Dict[str, WarmChair] = {}
+        self._embedded_texts: Dict[str, float] = {}
+
+    def _evict_expired(self) -> None:
+        """Drop warmed chairs and embedded texts older than ttl; call with self._lock held"""
+        cutoff = time.time() - self.ttl
+        for url in [url for url, chair in self._chairs.items() if chair.created_at < cutoff]:
+            del self._chairs[url]
+        for text in [text for text, created_at in self._embedded_texts.items() if created_at < cutoff]:
+            del self._embedded_texts[text]
+
+    def warm_chairs(self, chairs_data: Dict[str, Dict], openai_api_key: Optional[str]) -> None:
+        """Crawl every chair's website in the background (once per URL within ttl)"""
+        snapshots = get_snapshot_store()
+        for chair_name, chair in chairs_data.items():
+            url = chair["link"]
+            if snapshots.fresh(chair_name) is not None:
+                # scrape_chair will reuse the shared snapshot without crawling
+                continue
+            with self._lock:
+                self._evict_expired()
+                if url in self._chairs:
+                    continue
+                page_store = PageStore()
+                self._chairs[url] = WarmChair(
+                    page_store=page_store,
+                    future=self.executor.submit(self._crawl, chair_name, url, page_store, openai_api_key),
+                )
+
+    @staticmethod
+    def _crawl(chair_name: str, url: str, page_store: PageStore, openai_api_key: Optional[str]) -> None:
+        try:
+            ThesisCrawler(openai_api_key, page_store=page_store).crawl(url)
+            print(f"Prefetched {chair_name}: {page_store.report()}")
+        except Exception as e:
+            print(f"Prefetching {chair_name} failed: {str(e)}")
+
+    def take_page_store(self, url: str) -> PageStore:
+        """
+        Hand over the warmed PageStore of url (a fresh one if none was prefetched).
+        A crawl still in flight keeps filling it; PageStore.get never fetches
+        the same page twice, so the scrape just waits for those pages.
+        """
+        with self._lock:
+            self._evict_expired()
+            chair = self._chairs.pop(url, None)
+        return chair.page_store if chair is not None else PageStore()
+
+    def precompute_embedding(self, student: StudentProfile, openai_api_key: Optional[str]) -> None:
+        """Embed the student profile in the background unless this exact text was already embedded"""
+        text = student_profile_text(student)
+        with self._lock:
+            self._evict_expired()
+            if text in self._embedded_texts:
+                return
+            self._embedded_texts[text] = time.time()
+        self.executor.submit(self._embed, text, openai_api_key)
+
+    @staticmethod
+    def _embed(text: str, openai_api_key: Optional[str]) -> None:
+        try:
+            EmbeddingClient(openai_api_key).embed([text])
+        except Exception as e:
+            print(f"Prefetching the profile embedding failed: {str(e)}")
+
+
+_default_prefetcher: Optional[SpeculativePrefetcher] = None
+_default_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> SpeculativePrefetcher:
+    """Return the process-wide prefetcher shared by the Streamlit pages"""
+    global _default_prefetcher
+    with _default_prefetcher_lock:
+        if _default_prefetcher is None:
+            _default_prefetcher = SpeculativePrefetcher()
+        return _default_prefetcher
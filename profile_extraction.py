@@ -0,0 +1,170 @@
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+
+# Canonical research areas / topics; keys are lowercase aliases
+TOPIC_ALIASES: Dict[str, str] = {
+    "machine learning": "Machine Learning", "ml": "Machine Learning",
+    "deep learning": "Deep Learning", "dl": "Deep Learning",
+    "artificial intelligence": "Artificial Intelligence", "ai": "Artificial Intelligence",
+    "reinforcement learning": "Reinforcement Learning", "rl": "Reinforcement Learning",
+    "natural language processing": "Natural Language Processing", "nlp": "Natural Language Processing",
+    "large language models": "Large Language Models", "llm": "Large Language Models", "llms": "Large Language Models",
+    "computer vision": "Computer Vision",
+    "robotics": "Robotics", "autonomous driving": "Autonomous Driving",
+    "data science": "Data Science", "data analytics": "Data Analytics", "big data": "Big Data",
+    "databases": "Databases", "data engineering": "Data Engineering",
+    "computer graphics": "Computer Graphics", "visualization": "Visualization",
+    "distributed systems": "Distributed Systems", "cloud computing": "Cloud Computing",
+    "operating systems": "Operating Systems", "computer architecture": "Computer Architecture",
+    "embedded systems": "Embedded Systems", "high performance computing": "High Performance Computing",
+    "hpc": "High Performance Computing", "parallel computing": "Parallel Computing",
+    "networking": "Networking", "computer networks": "Computer Networks",
+    "security": "IT Security", "it security": "IT Security", "cybersecurity": "IT Security",
+    "cryptography": "Cryptography", "privacy": "Privacy",
+    "software engineering": "Software Engineering", "programming languages": "Programming Languages",
+    "compilers": "Compilers", "formal methods": "Formal Methods", "verification": "Formal Verification",
+    "formal verification": "Formal Verification",
+    "theoretical computer science": "Theoretical Computer Science", "algorithms": "Algorithms",
+    "complexity theory": "Complexity Theory", "logic": "Logic",
+    "quantum computing": "Quantum Computing", "quantum": "Quantum Computing",
+    "bioinformatics": "Bioinformatics", "medical imaging": "Medical Imaging",
+    "human computer interaction": "Human-Computer Interaction", "hci": "Human-Computer Interaction",
+    "information systems": "Information Systems", "business process management": "Business Process Management",
+    "optimization": "Optimization", "statistics": "Statistics", "signal processing": "Signal Processing",
+    "explainable ai": "Explainable AI", "xai": "Explainable AI", "generative models": "Generative Models",
+    "graph neural networks": "Graph Neural Networks", "gnn": "Graph Neural Networks",
+}
+
+SKILL_ALIASES: Dict[str, str] = {
+    "python": "Python", "java": "Java", "c": "C", "c++": "C++", "cpp": "C++", "c#": "C#",
+    "javascript": "JavaScript", "js": "JavaScript", "typescript": "TypeScript", "go": "Go",
+    "golang": "Go", "rust": "Rust", "kotlin": "Kotlin", "swift": "Swift", "scala": "Scala",
+    "r": "R", "matlab": "MATLAB", "julia": "Julia", "haskell": "Haskell", "sql": "SQL",
+    "bash": "Bash", "linux": "Linux", "git": "Git", "docker": "Docker", "kubernetes": "Kubernetes",
+    "aws": "AWS", "gcp": "GCP", "azure": "Azure", "spark": "Apache Spark", "hadoop": "Hadoop",
+    "pytorch": "PyTorch", "tensorflow": "TensorFlow", "keras": "Keras", "jax": "JAX",
+    "scikit-learn": "scikit-learn", "sklearn": "scikit-learn", "pandas": "pandas", "numpy": "NumPy",
+    "opencv": "OpenCV", "ros": "ROS", "cuda": "CUDA", "react": "React", "django": "Django",
+    "flask": "Flask", "latex": "LaTeX", "huggingface": "Hugging Face", "hugging face": "Hugging Face",
+    "langchain": "LangChain", "verilog": "Verilog", "vhdl": "VHDL", "qiskit": "Qiskit",
+    "machine learning": "Machine Learning", "deep learning": "Deep Learning",
+    "data analysis": "Data Analysis", "statistics": "Statistics",
+}
+
+# Vocabulary used for each student_data field
+FIELD_VOCABULARIES: Dict[str, Dict[str, str]] = {
+    "interests": TOPIC_ALIASES,
+    "preferred_topics": TOPIC_ALIASES,
+    "skills": SKILL_ALIASES,
+}
+
+# Conversational lead-ins removed before matching ("I'm interested in ...")
+_LEAD_IN = re.compile(
+    r"^(?:i(?:'m| am)?\s+(?:really\s+|mostly\s+|mainly\s+)?"
+    r"(?:interested in|into|like|love|enjoy|know|have experience (?:in|with)|am good at|work with|would like to work on|want to work on)"
+    r"|my (?:main )?(?:interests|skills|topics) (?:are|include)|mostly|mainly|especially|also)\s+",
+    re.IGNORECASE,
+)
+# "and" / "or" are handled separately: they only split known terms
+_SEPARATORS = re.compile(r"[,;\n/]|&|\+(?!\+)")
+_CONJUNCTIONS = re.compile(r"\s+(?:and|or)\s+", re.IGNORECASE)
+
+# Non-answers; escalated to the LLM rather than stored as terms
+STOP_PHRASES = frozenset({
+    "no", "none", "nothing", "nope", "na", "idk", "dunno", "no idea",
+    "not sure", "not sure yet", "i'm not sure", "im not sure", "i am not sure",
+    "i don't know", "i dont know", "don't know", "dont know", "not yet",
+    "nothing yet", "nothing specific", "not really", "anything", "whatever",
+    "everything", "same", "same as before", "skip", "pass",
+})
+
+
+@dataclass
+class ExtractionResult:
+    terms: List[str] = field(default_factory=list)
+    unknown: List[str] = field(default_factory=list)  # free-text fragments that were not understood
+
+    @property
+    def ambiguous(self) -> bool:
+        """True if the input should be escalated to the LLM"""
+        return not self.terms or bool(self.unknown)
+
+
+def _clean_fragment(raw: str) -> str:
+    return _LEAD_IN.sub("", raw.strip()).strip(" .!?:-\"'()")
+
+
+def _lookup(fragment: str, aliases: Dict[str, str], fuzzy_cutoff: float) -> Optional[str]:
+    """Canonical term for fragment: exact alias first, then the closest alias (typos)"""
+    key = fragment.lower()
+    if key in aliases:
+        return aliases[key]
+    close = difflib.get_close_matches(key, aliases.keys(), n=1, cutoff=fuzzy_cutoff)
+    return aliases[close[0]] if close else None
+
+
+def _split_fragments(text: str, aliases: Dict[str, str], fuzzy_cutoff: float) -> List[str]:
+    # "c++" would be split on "+" otherwise
+    protected = re.sub(r"c\+\+", "cpp", text, flags=re.IGNORECASE)
+    fragments = []
+    for raw in _SEPARATORS.split(protected):
+        fragment = _clean_fragment(raw)
+        if not fragment:
+            continue
+        # "machine learning and robotics" is two terms, "research and development" is one
+        parts = [_clean_fragment(part) for part in _CONJUNCTIONS.split(fragment)]
+        if len(parts) > 1 and all(part and _lookup(part, aliases, fuzzy_cutoff) for part in parts):
+            fragments.extend(parts)
+        else:
+            fragments.append(fragment)
+    return fragments
+
+
+def _known_terms_in(fragment: str, aliases: Dict[str, str]) -> List[str]:
+    """Vocabulary terms mentioned inside a longer fragment, matched on word boundaries"""
+    lowered = fragment.lower()
+    return [
+        canonical for alias, canonical in aliases.items()
+        if len(alias) > 2 and re.search(rf"(?<![\w+#]){re.escape(alias)}(?![\w+#])", lowered)
+    ]
+
+
+def extract_terms(text: str, field_name: str, fuzzy_cutoff: float = 0.85) -> ExtractionResult:
+    """
+    Deterministically extract interests, topics or skills from a chat answer.
+
+    The answer is split on commas and similar separators, and on "and"/"or"
+    only where every side is a known term. Each fragment is matched exactly
+    against the field's alias vocabulary, then fuzzily (difflib) to catch
+    typos. Non-answers ("not sure yet") and fragments outside the vocabulary
+    are reported as unknown, so the caller falls back to the LLM; the known
+    terms mentioned inside such fragments are still returned.
+    """
+    aliases = FIELD_VOCABULARIES[field_name]
+    result = ExtractionResult()
+    for fragment in _split_fragments(text, aliases, fuzzy_cutoff):
+        if fragment.lower() in STOP_PHRASES:
+            result.unknown.append(fragment)
+            continue
+        term = _lookup(fragment, aliases, fuzzy_cutoff)
+        if term is not None:
+            result.terms.append(term)
+            continue
+        result.terms.extend(_known_terms_in(fragment, aliases))
+        result.unknown.append(fragment)
+    result.terms = merge_terms([], result.terms)
+    return result
+
+
+def merge_terms(existing: Iterable[str], new: Iterable[str]) -> List[str]:
+    """existing followed by the new terms, without case-insensitive duplicates"""
+    merged, seen = [], set()
+    for term in list(existing) + list(new):
+        key = term.strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(term.strip())
+    return merged
@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# Bump when StudentProfile changes incompatibly and add an upgrade step below;
+# rows of older versions are upgraded on load
+SCHEMA_VERSION = 1
+
+# version -> function turning profile data of that version into the next version's
+UPGRADES: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+
+def upgrade_profile_data(data: Dict[str, Any], version: int) -> Dict[str, Any]:
+    """Bring profile data stored with schema version up to SCHEMA_VERSION"""
+    while version < SCHEMA_VERSION:
+        data = UPGRADES[version](data)
+        version += 1
+    return data
+
+
+@dataclass
+class StudentProfile:
+    student_id: str
+    interests: List[str] = field(default_factory=list)
+    preferred_topics: List[str] = field(default_factory=list)
+    skills: List[str] = field(default_factory=list)
+    courses: List[Dict[str, str]] = field(default_factory=list)  # [{"name": ..., "grade": ...}]
+    gpa: Optional[str] = None
+    key_areas: List[str] = field(default_factory=list)
+    honors: List[str] = field(default_factory=list)
+    cv_summary: str = ""
+    transcript_summary: str = ""
+    motivation_letter_text: Optional[str] = None
+    personal_info: Dict[str, Any] = field(default_factory=dict)
+    cv_path: Optional[str] = None
+    transcript_path: Optional[str] = None
+    motivation_letter_path: Optional[str] = None
+    status: Optional[str] = None
+    confirmation_time: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, student_id: str, data: Dict[str, Any]) -> "StudentProfile":
+        """Build a profile from StudentAgent's session student_data; unknown keys are ignored"""
+        known = {f.name for f in fields(cls)} - {"student_id"}
+        values = {key: value for key, value in data.items() if key in known and value is not None}
+        for key in ("cv_summary", "transcript_summary"):
+            if key in values:
+                values[key] = values[key].strip()
+        return cls(student_id=student_id, **values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_legacy_profile(student_dir: Path) -> StudentProfile:
+    """
+    Read a profile saved before the profile store existed:
+    student_data.json plus cv_summary.txt and transcript_summary.txt.
+    """
+    with open(student_dir / "student_data.json", "r", encoding='utf-8') as f:
+        student_data = json.load(f)
+    with open(student_dir / "cv_summary.txt", "r", encoding='utf-8') as f:
+        student_data["cv_summary"] = f.read()
+    with open(student_dir / "transcript_summary.txt", "r", encoding='utf-8') as f:
+        student_data["transcript_summary"] = f.read()
+
+    # Key areas of study were only kept inside the formatted transcript summary
+    transcript_summary = student_data["transcript_summary"]
+    if not student_data.get("key_areas") and "Key Areas of Study:" in transcript_summary:
+        areas = transcript_summary.split("Key Areas of Study:")[1].strip()
+        student_data["key_areas"] = [
+            area.strip("- ")
+            for area in areas.split("\n")
+            if area.strip().startswith("-")
+        ]
+    return StudentProfile.from_dict(student_dir.name, student_data)
+
+
+class ProfileStore:
+    """
+    SQLite store of student profiles, one row per student ID.
+
+    The database runs in WAL mode so the matcher can read a profile while the
+    chat page writes; every save is a single atomic upsert of the whole
+    profile as JSON, tagged with the schema version it was written with.
+    """
+
+    def __init__(self, path: Union[str, Path] = "student_data/profiles.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # student_id is the primary key, so lookups by ID use its index
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS profiles (
+                student_id TEXT PRIMARY KEY,
+                schema_version INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def save(self, profile: StudentProfile) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO profiles (student_id, schema_version, data, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(student_id) DO UPDATE SET "
+                "schema_version = excluded.schema_version, data = excluded.data, updated_at = excluded.updated_at",
+                (profile.student_id, SCHEMA_VERSION, json.dumps(profile.to_dict()), time.time()),
+            )
+
+    def load(self, student_id: str) -> Optional[StudentProfile]:
+        """The student's profile in one read, or None if it was never saved"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT schema_version, data FROM profiles WHERE student_id = ?", (student_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        schema_version, data = row
+        return StudentProfile.from_dict(student_id, upgrade_profile_data(json.loads(data), schema_version))
+
+    def load_or_import(self, student_dir: Path) -> StudentProfile:
+        """Load the profile of student_dir.name, importing legacy files on first use"""
+        profile = self.load(student_dir.name)
+        if profile is None:
+            profile = load_legacy_profile(student_dir)
+            self.save(profile)
+        return profile
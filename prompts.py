@@ -29,6 +29,36 @@ Please format the response in json format:
 If any section cannot be found, please indicate with "Not found in provided HTML".
 """
 
+# Output structure expected by matching_agent.parse_chair_data
+CHAIR_REPORT_FORMAT = """CHAIR INFORMATION:
+- Chair/Department Name:
+- Website:
+- General Contact:
+- Application Process:
+- General Requirements:
+- Research Areas:
+
+THESIS OPPORTUNITIES:
+For each thesis found:
+**Opportunity**
+- Type: [Master thesis, Bachelor thesis, Project]
+- Title:
+- Description:
+- URL:
+- Contact Person:
+- Research Fields:
+- Technical Requirements:
+- Academic Requirements:
+- Timeline:
+- Additional Information:
+
+Remember:
+1. Keep URLs absolute
+2. Include ALL found thesis opportunities
+3. Be explicit about missing information
+4. Keep proper formatting and sections
+"""
+
 
 def get_chair_scrapping_prompt(url):
     chair_scrapping_prompt =  f"""
@@ -60,32 +90,28 @@ Action Input: [Another relevant URL]
 Thought: I have gathered all the information. Let me structure it.
 Final Answer: Present the information in this structure:
 
-CHAIR INFORMATION:
-- Chair/Department Name:
-- Website:
-- General Contact:
-- Application Process:
-- General Requirements:
-- Research Areas:
+{CHAIR_REPORT_FORMAT}        """
+    return chair_scrapping_prompt
 
-THESIS OPPORTUNITIES:
-For each thesis found:
-**Opportunity**
-- Type: [Master thesis, Bachelor thesis, Project]
-- Title:
-- Description:
-- URL:
-- Contact Person:
-- Research Fields:
-- Technical Requirements:
-- Academic Requirements:
-- Timeline:
-- Additional Information:
 
-Remember:
-1. Keep URLs absolute
-2. Include ALL found thesis opportunities
-3. Be explicit about missing information
-4. Keep proper formatting and sections
-        """
-    return chair_scrapping_prompt
+
+def get_chair_extraction_prompt(url, pages):
+    """Single-call extraction prompt over pages already collected by the crawler"""
+    page_sections = "\n\n".join(
+        f"=== PAGE: {page_url} ===\n{page_text}" for page_url, page_text in pages
+    )
+    chair_extraction_prompt = f"""
+You are an expert at analyzing university webpages for thesis opportunities.
+
+Chair website: {url}
+
+Below is the text content of the chair's home page and of the pages most likely to
+list thesis topics, open positions or student projects:
+
+{page_sections}
+
+Extract the chair information and ALL thesis opportunities from these pages.
+Present the information in this structure:
+
+{CHAIR_REPORT_FORMAT}"""
+    return chair_extraction_prompt
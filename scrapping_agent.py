@@ -2,12 +2,15 @@ from langchain.agents import initialize_agent, Tool
 from langchain.agents import AgentType
 from langchain.chat_models import ChatOpenAI
 from langchain.tools import BaseTool
-from bs4 import BeautifulSoup
-import requests
+from langchain.callbacks.base import BaseCallbackHandler
+from llm_scheduler import BATCH, get_scheduler
+from tokens import count_tokens
+from page_store import PageStore
+from http_client import async_http_session
+from prompts import get_chair_scrapping_prompt
 from typing import Optional, Type, Any
 from pydantic import BaseModel, Field
 import re
-from urllib.parse import urljoin
 
 
 class URLNavigatorInput(BaseModel):
@@ -17,77 +20,88 @@ class WebPageScraperTool(BaseTool):
     name: str = "web_page_scraper"
     description: str = "Useful for getting the content of a web page. Input should be a URL."
     args_schema: Type[BaseModel] = URLNavigatorInput
+    page_store: Any = None
     
     def _run(self, url: str) -> str:
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            # Get text content
-            text = soup.get_text()
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text
+            page = (self.page_store or PageStore()).get(url)
+            return page.text
         except Exception as e:
             return f"Error fetching webpage: {str(e)}"
 
-    def _arun(self, url: str) -> Any:
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, url: str) -> str:
+        try:
+            page = await (self.page_store or PageStore()).aget(url)
+            return page.text
+        except Exception as e:
+            return f"Error fetching webpage: {str(e)}"
 
 class LinkExtractorTool(BaseTool):
     name: str = "link_extractor"
     description: str = "Useful for extracting links from a webpage. Input should be a URL."
     args_schema: Type[BaseModel] = URLNavigatorInput
+    page_store: Any = None
     
     def _run(self, url: str) -> str:
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            links = []
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                # Convert relative URLs to absolute URLs
-                absolute_url = urljoin(url, href)
-                link_text = link.get_text().strip()
-                if link_text:  # Only include links with text
-                    links.append(f"{link_text}: {absolute_url}")
-            
-            return "\n".join(links)
+            page = (self.page_store or PageStore()).get(url)
+            return "\n".join(f"{link_text}: {absolute_url}" for link_text, absolute_url in page.links)
         except Exception as e:
             return f"Error extracting links: {str(e)}"
 
-    def _arun(self, url: str) -> Any:
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, url: str) -> str:
+        try:
+            page = await (self.page_store or PageStore()).aget(url)
+            return "\n".join(f"{link_text}: {absolute_url}" for link_text, absolute_url in page.links)
+        except Exception as e:
+            return f"Error extracting links: {str(e)}"
     
 
 
-def create_thesis_opportunities_agent(openai_api_key: str):
+class RateLimitCallbackHandler(BaseCallbackHandler):
+    """Makes each LangChain LLM call wait for the shared rate-limit scheduler"""
+
+    def __init__(self, model_name: str, priority: int = BATCH):
+        self.model_name = model_name
+        self.priority = priority
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        tokens = sum(count_tokens(prompt) for prompt in prompts) + 500
+        get_scheduler().acquire("openai", self.model_name, tokens=tokens, priority=self.priority)
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        tokens = sum(count_tokens(str(m.content)) for batch in messages for m in batch) + 500
+        get_scheduler().acquire("openai", self.model_name, tokens=tokens, priority=self.priority)
+
+
+def create_thesis_opportunities_agent(openai_api_key: str, page_store: Optional[PageStore] = None):
+    """
+    Build the ReAct scraping agent. Both tools share page_store, so each page
+    is fetched and parsed once per run; pass your own store to read its stats.
+    """
+    if page_store is None:
+        page_store = PageStore()
+
     llm = ChatOpenAI(
         temperature=0,
         model_name="gpt-4o",
         openai_api_key=openai_api_key,
-        
+        callbacks=[RateLimitCallbackHandler("gpt-4o")],
     )
     
+    web_page_scraper = WebPageScraperTool(page_store=page_store)
+    link_extractor = LinkExtractorTool(page_store=page_store)
     tools = [
         Tool(
             name="web_page_scraper",
-            func=WebPageScraperTool()._run,
+            func=web_page_scraper._run,
+            coroutine=web_page_scraper._arun,
             description="Useful for getting the content of a web page. Input should be a URL."
         ),
         Tool(
             name="link_extractor",
-            func=LinkExtractorTool()._run,
+            func=link_extractor._run,
+            coroutine=link_extractor._arun,
             description="Useful for extracting links from a webpage. Input should be a URL."
         )
     ]
@@ -101,4 +115,14 @@ def create_thesis_opportunities_agent(openai_api_key: str):
         max_iterations=10,        
     )
     
-    return agent
\ No newline at end of file
+    return agent
+
+
+async def arun_thesis_opportunities_agent(openai_api_key: str, url: str, page_store: Optional[PageStore] = None) -> str:
+    """
+    Run the scraping agent for one chair on the running event loop. The
+    loop's async HTTP client is closed once no other run is using it.
+    """
+    agent = create_thesis_opportunities_agent(openai_api_key, page_store=page_store)
+    async with async_http_session():
+        return await agent.arun(get_chair_scrapping_prompt(url))
@@ -2,23 +2,72 @@ import streamlit as st
 from openai import OpenAI
 from pathlib import Path
 import json
-import PyPDF2
 from datetime import datetime
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 import uuid
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_scheduler import INTERACTIVE, estimate_tokens, get_scheduler
+from pdf_extraction import PDFTextExtractor
+from document_cache import DocumentCache, document_sha256
+from text_normalization import normalize_pages, normalize_text
+from profile_extraction import extract_terms, merge_terms
+from chairs import DEFAULT_CHAIRS, load_chairs_data, sample_chairs
+from prefetch import get_prefetcher
+from profile_store import ProfileStore, StudentProfile
 
 # load dotenv
 from dotenv import load_dotenv
 load_dotenv()
 
+CONVERSATION_STAGES = ["initial", "cv_uploaded", "interests_shared", "topics_shared", "skills_shared", "completed"]
+# Stages from which the speculative prefetch starts crawling chairs / embedding the profile
+PREFETCH_CHAIRS_STAGE = "interests_shared"
+PREFETCH_EMBEDDING_STAGE = "skills_shared"
+
+# student_data field filled by the answer to the question asked in each stage
+STAGE_FIELDS = {
+    "cv_uploaded": "interests",
+    "interests_shared": "preferred_topics",
+    "topics_shared": "skills",
+}
+FIELD_LABELS = {"interests": "interests", "preferred_topics": "topics", "skills": "skills"}
+
+# Bump a version whenever its prompt changes so cached results are recomputed
+CV_SUMMARY_PROMPT_VERSION = "v1"
+TRANSCRIPT_PROMPT_VERSION = "v1"
+
+@st.cache_resource
+def get_document_cache() -> DocumentCache:
+    """
+    Process-wide DocumentCache, so reruns reuse one SQLite connection and
+    entries of outdated prompt versions are purged once, not on every rerun
+    """
+    document_cache = DocumentCache()
+    document_cache.invalidate_stale({
+        "cv_summary": CV_SUMMARY_PROMPT_VERSION,
+        "transcript_analysis": TRANSCRIPT_PROMPT_VERSION,
+    })
+    return document_cache
+
+@st.cache_resource
+def get_profile_store() -> ProfileStore:
+    """Process-wide ProfileStore; its connection is shared by all sessions and reruns"""
+    return ProfileStore()
+
 class StudentAgent:
     def __init__(self, openai_api_key: str):
         self.client = OpenAI(api_key=openai_api_key)
+        # Shared rate limiter; chat requests use the INTERACTIVE lane
+        self.scheduler = get_scheduler()
         self.data_dir = Path("student_data")
         self.data_dir.mkdir(exist_ok=True)
+        self.pdf_extractor = PDFTextExtractor()
+        self.profile_store = get_profile_store()
+        # CV summaries and transcript analyses keyed by the uploaded bytes
+        self.document_cache = get_document_cache()
 
         self.chairs = [
             "Chair of Software Engineering",
@@ -48,6 +97,8 @@ class StudentAgent:
                 "transcript_summary": None,
                 "courses": [],
                 "gpa": None,
+                "key_areas": [],
+                "honors": [],
                 "motivation_letter_path": None,
                 "motivation_letter_summary": None,
                 "motivation_letter_feedback": None
@@ -64,6 +115,13 @@ class StudentAgent:
             st.session_state.motivation_letter_uploaded = False
         if 'confirm_message_displayed' not in st.session_state:
             st.session_state.confirm_message_displayed = False
+        # Matching settings read by MatchingProgress; chair_names=None considers every chair
+        if 'chair_names' not in st.session_state:
+            st.session_state.chair_names = list(DEFAULT_CHAIRS)
+        if 'num_chairs' not in st.session_state:
+            st.session_state.num_chairs = 2
+        if 'max_scrape_workers' not in st.session_state:
+            st.session_state.max_scrape_workers = 4
 
 
     def save_uploaded_file(self, uploaded_file, file_type: str) -> Path:
@@ -78,65 +136,61 @@ class StudentAgent:
 
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extract text content from PDF file."""
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        return text
-
-    def summarize_cv(self, cv_text: str) -> str:
-        """Use OpenAI to summarize CV content."""
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert at analyzing CVs. Summarize the key points including education, skills, and experience."},
-                {"role": "user", "content": f"Please summarize this CV:\n\n{cv_text}"}
-            ]
+        return self.pdf_extractor.extract_text(pdf_path)
+
+    def stream_chat(self, messages: list, model: str = "gpt-3.5-turbo") -> Iterator[str]:
+        """Stream a chat completion, yielding content chunks as they arrive."""
+        stream = self.scheduler.call(
+            "openai",
+            model,
+            lambda: self.client.chat.completions.create(model=model, messages=messages, stream=True),
+            tokens=estimate_tokens(messages),
+            priority=INTERACTIVE,
         )
-        return response.choices[0].message.content
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def stream_cv_summary(self, cv_text: str, document_hash: Optional[str] = None) -> Iterator[str]:
+        """Use OpenAI to summarize CV content, streaming the summary.
+
+        With document_hash (SHA-256 of the uploaded PDF) a previously computed
+        summary is returned in one chunk and new summaries are stored.
+        """
+        if document_hash is not None:
+            cached = self.document_cache.get_result("cv_summary", CV_SUMMARY_PROMPT_VERSION, document_hash)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        for chunk in self.stream_chat([
+            {"role": "system", "content": "You are an expert at analyzing CVs. Summarize the key points including education, skills, and experience."},
+            {"role": "user", "content": f"Please summarize this CV:\n\n{cv_text}"}
+        ]):
+            chunks.append(chunk)
+            yield chunk
+
+        if document_hash is not None:
+            self.document_cache.set_result("cv_summary", CV_SUMMARY_PROMPT_VERSION, document_hash, "".join(chunks))
+
+    def summarize_cv(self, cv_text: str, document_hash: Optional[str] = None) -> str:
+        """Use OpenAI to summarize CV content."""
+        return "".join(self.stream_cv_summary(cv_text, document_hash))
 
     def clean_extracted_text(self, text: str) -> str:
         """Clean and format extracted text from PDF."""
-        # Split into lines and remove empty lines
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        # Join words that were incorrectly split
-        cleaned_text = ""
-        buffer = []
-        
-        for line in lines:
-            # If line ends with a period, question mark, or exclamation mark, it's likely a sentence end
-            if line.endswith(('.', '?', '!')):
-                buffer.append(line)
-                cleaned_text += ' '.join(buffer) + '\n\n'
-                buffer = []
-            # If line has just one word and the next line might be a continuation
-            elif len(line.split()) <= 2:
-                buffer.append(line)
-            else:
-                buffer.append(line)
-                cleaned_text += ' '.join(buffer) + '\n\n'
-                buffer = []
-        
-        # Add any remaining text
-        if buffer:
-            cleaned_text += ' '.join(buffer)
-        
-        # Clean up spacing
-        cleaned_text = ' '.join(cleaned_text.split())
-        
-        # Add proper paragraph breaks
-        cleaned_text = cleaned_text.replace('. ', '.\n\n')
-        
-        return cleaned_text
+        return normalize_text(text)
 
-    def analyze_transcript(self, transcript_text: str) -> dict:
+    def analyze_transcript(self, transcript_text: str, document_hash: Optional[str] = None) -> dict:
         """Use OpenAI to analyze transcript and extract courses and grades."""
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": """
+        if document_hash is not None:
+            cached = self.document_cache.get_result("transcript_analysis", TRANSCRIPT_PROMPT_VERSION, document_hash)
+            if cached is not None:
+                return cached
+
+        messages = [
+            {"role": "system", "content": """
 You are an expert at analyzing academic transcripts. Extract and organize the following information:
 1. List of all courses with their grades (in the format: Course Name: Grade)
 2. Calculate the overall GPA if possible
@@ -151,12 +205,18 @@ Provide the information in a JSON format with the following structure:
     "honors": ["Honor1", "Honor2"]
 }
 """},
-                {"role": "user", "content": f"Please analyze this transcript:\n\n{transcript_text}"}
-            ]
+            {"role": "user", "content": f"Please analyze this transcript:\n\n{transcript_text}"}
+        ]
+        response = self.scheduler.call(
+            "openai",
+            "gpt-3.5-turbo",
+            lambda: self.client.chat.completions.create(model="gpt-3.5-turbo", messages=messages),
+            tokens=estimate_tokens(messages, max_output_tokens=1500),
+            priority=INTERACTIVE,
         )
         
         try:
-            return json.loads(response.choices[0].message.content)
+            analysis = json.loads(response.choices[0].message.content)
         except json.JSONDecodeError:
             return {
                 "courses": [],
@@ -165,6 +225,11 @@ Provide the information in a JSON format with the following structure:
                 "honors": []
             }
 
+        # Only successful analyses are cached so a bad reply is retried next time
+        if document_hash is not None:
+            self.document_cache.set_result("transcript_analysis", TRANSCRIPT_PROMPT_VERSION, document_hash, analysis)
+        return analysis
+
     def format_transcript_summary(self, analysis: dict) -> str:
         """Format transcript analysis into a readable summary."""
         summary = "📚 Transcript Analysis:\n\n"
@@ -235,11 +300,15 @@ Please type 'confirm' to proceed with the matching process, or share any additio
 
 
     def process_user_input(self, user_input: str) -> str:
-        """Process user input and update student data."""                    
+        """Process user input and update student data."""
+        return "".join(self.stream_user_input(user_input))
+
+    def stream_user_input(self, user_input: str) -> Iterator[str]:
+        """Process user input and update student data, streaming the response."""
         if st.session_state.conversation_stage == "completed":
             if user_input.lower().strip() == "confirm":
                 st.session_state.confirm_message_displayed = True
-                return """
+                yield """
                         Thank you for confirming! 🎉 I'm now sending your profile to our matching system. 
                         The system will analyze:
                         - Your CV and academic background
@@ -251,53 +320,206 @@ Please type 'confirm' to proceed with the matching process, or share any additio
                         You'll receive the matching results soon. Good luck with your thesis journey! 🌟
 
                         Note: This conversation has been saved and your profile is being processed."""
+                return
             
             # If not confirmed, treat as additional information
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing student responses and extracting relevant information for thesis matching."},
-                    {"role": "user", "content": f"Process this additional information from the student: {user_input}"}
-                ]
+            yield from self.stream_chat([
+                {"role": "system", "content": "You are an expert at analyzing student responses and extracting relevant information for thesis matching."},
+                {"role": "user", "content": f"Process this additional information from the student: {user_input}"}
+            ])
+            yield "\n\nPlease type 'confirm' when you're ready to proceed with the matching process."
+            return
+
+        # Structured answers are captured locally; the LLM is only asked when
+        # the answer is free text the extractor cannot split into terms
+        field_name = STAGE_FIELDS.get(st.session_state.conversation_stage)
+        if field_name is not None:
+            extraction = extract_terms(user_input, field_name)
+            terms = extraction.terms
+            if extraction.ambiguous:
+                terms = merge_terms(terms, self.llm_extract_terms(user_input, field_name))
+            st.session_state.student_data[field_name] = merge_terms(
+                st.session_state.student_data[field_name], terms
             )
-            return response.choices[0].message.content + "\n\nPlease type 'confirm' when you're ready to proceed with the matching process."
+            if terms:
+                yield f"Got it! I've noted these {FIELD_LABELS[field_name]}: {', '.join(terms)}."
+            else:
+                yield f"I couldn't pick out any specific {FIELD_LABELS[field_name]} from that, but I'll keep it in mind."
+            return
 
         # Normal processing for other stages
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert at analyzing student responses and extracting relevant information for thesis matching."},
-                {"role": "user", "content": f"Process this student response and extract relevant information: {user_input}"}
-            ]
+        yield from self.stream_chat([
+            {"role": "system", "content": "You are an expert at analyzing student responses and extracting relevant information for thesis matching."},
+            {"role": "user", "content": f"Process this student response and extract relevant information: {user_input}"}
+        ])
+
+    def llm_extract_terms(self, user_input: str, field_name: str) -> List[str]:
+        """Ask the LLM for the terms in a free-text answer (fallback of extract_terms)"""
+        messages = [
+            {"role": "system", "content": "You are an expert at analyzing student responses and extracting relevant information for thesis matching."},
+            {"role": "user", "content": (
+                f"Extract the student's {FIELD_LABELS[field_name]} from this answer as short terms. "
+                f'Respond in JSON as {{"terms": ["term", ...]}}.\n\nAnswer: {user_input}'
+            )}
+        ]
+        response = self.scheduler.call(
+            "openai",
+            "gpt-3.5-turbo",
+            lambda: self.client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                response_format={"type": "json_object"},
+            ),
+            tokens=estimate_tokens(messages, max_output_tokens=200),
+            priority=INTERACTIVE,
         )
-        
-        # Update student data based on conversation stage
-        if st.session_state.conversation_stage == "interests_shared":
-            st.session_state.student_data["interests"].extend(
-                [interest.strip() for interest in user_input.split(",") if interest.strip()]
-            )
-        elif st.session_state.conversation_stage == "topics_shared":
-            st.session_state.student_data["preferred_topics"].extend(
-                [topic.strip() for topic in user_input.split(",") if topic.strip()]
-            )
-        elif st.session_state.conversation_stage == "skills_shared":
-            st.session_state.student_data["skills"].extend(
-                [skill.strip() for skill in user_input.split(",") if skill.strip()]
-            )
-            
-        return response.choices[0].message.content
+        try:
+            terms = json.loads(response.choices[0].message.content).get("terms", [])
+            return [str(term) for term in terms if str(term).strip()]
+        except (json.JSONDecodeError, AttributeError):
+            return []
 
     def save_student_data(self):
-        """Save all student data to JSON file."""
-        student_dir = self.data_dir / st.session_state.current_student_id
-        student_dir.mkdir(exist_ok=True)
-        
-        data_path = student_dir / "student_data.json"
-        with open(data_path, "w") as f:
-            json.dump(st.session_state.student_data, f, indent=4)
+        """Save all student data to the profile store (one atomic upsert)."""
+        self.profile_store.save(
+            StudentProfile.from_dict(st.session_state.current_student_id, st.session_state.student_data)
+        )
+
+    def ingest_cv(self, cv_path: Path, content_hash: str) -> Dict[str, Any]:
+        """Extract and summarize a saved CV. Runs on a worker thread, so no Streamlit calls."""
+        cv_summary = self.summarize_cv(self.extract_text_from_pdf(cv_path), content_hash)
+        return {"cv_path": str(cv_path), "cv_summary": cv_summary}
+
+    def ingest_transcript(self, transcript_path: Path, content_hash: str) -> Dict[str, Any]:
+        """Extract and analyze a saved transcript. Runs on a worker thread, so no Streamlit calls."""
+        transcript_analysis = self.analyze_transcript(self.extract_text_from_pdf(transcript_path), content_hash)
+        transcript_summary = self.format_transcript_summary(transcript_analysis)
+        return {
+            "transcript_path": str(transcript_path),
+            "transcript_summary": transcript_summary,
+            "courses": transcript_analysis.get("courses", []),
+            "gpa": transcript_analysis.get("gpa"),
+            "key_areas": transcript_analysis.get("key_areas", []),
+            "honors": transcript_analysis.get("honors", []),
+        }
+
+    def ingest_motivation_letter(self, letter_path: Path, content_hash: str) -> Dict[str, Any]:
+        """Extract, clean and save a motivation letter page by page. Runs on a worker thread."""
+        text_path = letter_path.parent / "motivation_letter.txt"
+        chunks = []
+        with open(text_path, "w", encoding='utf-8') as f:
+            for chunk in normalize_pages(self.pdf_extractor.iter_pages(letter_path)):
+                f.write(chunk)
+                chunks.append(chunk)
+        return {"motivation_letter_path": str(letter_path), "motivation_letter_text": "".join(chunks)}
+
+    def ingest_documents(self, pending: list) -> None:
+        """
+        Process uploaded documents concurrently, one worker per document.
+        pending holds (kind, uploaded_file, status_placeholder) tuples; results
+        are applied to the session state once all documents have finished.
+        """
+        labels = {"cv": "CV", "transcript": "transcript", "motivation_letter": "motivation letter"}
+        workers = {
+            "cv": self.ingest_cv,
+            "transcript": self.ingest_transcript,
+            "motivation_letter": self.ingest_motivation_letter,
+        }
+        progress_bar = st.progress(0.0, text=f"Processing {len(pending)} document(s)...")
+
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {}
+            for kind, uploaded, status in pending:
+                # Saving reads st.session_state, so it stays on the script thread
+                path = self.save_uploaded_file(uploaded, kind)
+                status.info(f"⏳ Processing your {labels[kind]}...")
+                future = executor.submit(workers[kind], path, document_sha256(uploaded.getvalue()))
+                futures[future] = (kind, status)
+
+            results = {}
+            for done, future in enumerate(as_completed(futures), start=1):
+                kind, status = futures[future]
+                try:
+                    results[kind] = future.result()
+                    status.success(f"✅ {labels[kind].capitalize()} processed")
+                except Exception as e:
+                    status.error(f"Could not process your {labels[kind]}: {str(e)}")
+                progress_bar.progress(done / len(futures), text=f"Processed {done} of {len(futures)} document(s)")
+
+        progress_bar.empty()
+        for kind, result in results.items():
+            st.session_state.student_data.update(result)
+            st.session_state[f"{kind}_uploaded"] = True
+        if results:
+            self.save_student_data()
+
+    def matching_settings(self) -> None:
+        """
+        Sidebar controls for the chairs MatchingProgress scrapes and how many
+        run in parallel. The sample is drawn here, once per setting change,
+        so the prefetch warms exactly the chairs that will be scraped.
+        """
+        state = st.session_state
+        try:
+            all_chairs = list(load_chairs_data(None).keys())
+        except (OSError, ValueError) as e:
+            print(f"Skipping matching settings: {str(e)}")
+            return
+        # Widget state is dropped when the page switches, so values are copied to plain keys
+        widget_defaults = {
+            "all_chairs_widget": state.chair_names is None,
+            "chair_names_widget": [c for c in state.chair_names or DEFAULT_CHAIRS if c in all_chairs],
+            "num_chairs_widget": state.num_chairs or 0,
+            "max_scrape_workers_widget": state.max_scrape_workers,
+        }
+        for key, value in widget_defaults.items():
+            if key not in state:
+                state[key] = value
+
+        with st.sidebar.expander("Matching settings"):
+            use_all = st.toggle("Consider all chairs", key="all_chairs_widget")
+            chair_names = st.multiselect("Chairs", all_chairs, key="chair_names_widget", disabled=use_all)
+            num_chairs = st.number_input("Chairs to scrape (0 = all)", min_value=0, step=1, key="num_chairs_widget")
+            max_workers = st.slider("Chairs scraped in parallel", 1, 16, key="max_scrape_workers_widget")
+
+        state.chair_names = None if use_all else chair_names
+        state.num_chairs = int(num_chairs) or None
+        state.max_scrape_workers = max_workers
+
+        selection = (None if use_all else tuple(chair_names), state.num_chairs)
+        if state.get("selected_chairs_for") != selection:
+            candidates = all_chairs if use_all else chair_names
+            state.selected_chairs = sample_chairs(candidates, state.num_chairs)
+            state.selected_chairs_for = selection
+
+    def speculative_prefetch(self) -> None:
+        """
+        Start matching work in the background once the profile is nearly
+        complete, so that 'confirm' leads into a partly warmed pipeline.
+        """
+        stage_index = CONVERSATION_STAGES.index(st.session_state.conversation_stage)
+        openai_api_key = os.environ.get("OPENAI_API_KEY")
+        prefetcher = get_prefetcher()
+
+        selected_chairs = st.session_state.get("selected_chairs")
+        if stage_index >= CONVERSATION_STAGES.index(PREFETCH_CHAIRS_STAGE) and selected_chairs:
+            try:
+                # Exactly the chairs MatchingProgress will scrape (sampled in matching_settings)
+                prefetcher.warm_chairs(load_chairs_data(selected_chairs), openai_api_key)
+            except (OSError, ValueError) as e:
+                print(f"Skipping chair prefetch: {str(e)}")
+
+        if stage_index >= CONVERSATION_STAGES.index(PREFETCH_EMBEDDING_STAGE):
+            # Same profile the matcher will load from the profile store
+            prefetcher.precompute_embedding(
+                StudentProfile.from_dict(st.session_state.current_student_id, st.session_state.student_data),
+                openai_api_key,
+            )
 
     def run(self):
         st.title("Thesis Matching Assistant")
+        self.matching_settings()
+        self.speculative_prefetch()
         
         # Display chat messages
         for message in st.session_state.messages:
@@ -319,63 +541,27 @@ Please type 'confirm' to proceed with the matching process, or share any additio
             
             with col1:
                 cv_file = st.file_uploader("Upload your CV (PDF)", type="pdf", key="cv_upload")
-                if cv_file and not st.session_state.cv_uploaded:
-                    with st.spinner('Processing your CV...'):
-                        cv_path = self.save_uploaded_file(cv_file, "cv")
-                        cv_text = self.extract_text_from_pdf(cv_path)
-                        cv_summary = self.summarize_cv(cv_text)
-                        
-                        st.session_state.student_data["cv_path"] = str(cv_path)
-                        st.session_state.student_data["cv_summary"] = cv_summary
-                        
-                        summary_path = cv_path.parent / "cv_summary.txt"
-                        with open(summary_path, "w") as f:
-                            f.write(cv_summary)
-                        
-                        st.session_state.cv_uploaded = True
-            
+                cv_status = st.empty()
             with col2:
                 transcript_file = st.file_uploader("Upload your Transcript (PDF)", type="pdf", key="transcript_upload")
-                if transcript_file and not st.session_state.transcript_uploaded:
-                    with st.spinner('Processing your transcript...'):
-                        transcript_path = self.save_uploaded_file(transcript_file, "transcript")
-                        transcript_text = self.extract_text_from_pdf(transcript_path)
-                        transcript_analysis = self.analyze_transcript(transcript_text)
-                        transcript_summary = self.format_transcript_summary(transcript_analysis)
-                        
-                        st.session_state.student_data["transcript_path"] = str(transcript_path)
-                        st.session_state.student_data["transcript_summary"] = transcript_summary
-                        st.session_state.student_data["courses"] = transcript_analysis.get("courses", [])
-                        st.session_state.student_data["gpa"] = transcript_analysis.get("gpa")
-                        
-                        summary_path = transcript_path.parent / "transcript_summary.txt"
-                        with open(summary_path, "w") as f:
-                            f.write(transcript_summary)
-                        
-                        st.session_state.transcript_uploaded = True
-
-
+                transcript_status = st.empty()
             with col3:
                 motivation_letter = st.file_uploader("Upload Motivation Letter (Optional)", type="pdf", key="motivation_upload")
-                if motivation_letter and not st.session_state.motivation_letter_uploaded:
-                    with st.spinner('Processing your motivation letter...'):
-                        # Save PDF
-                        letter_path = self.save_uploaded_file(motivation_letter, "motivation_letter")
-                        
-                        # Extract and clean text
-                        raw_text = self.extract_text_from_pdf(letter_path)
-                        cleaned_text = self.clean_extracted_text(raw_text)
-                        
-                        # Save cleaned text
-                        text_path = letter_path.parent / "motivation_letter.txt"
-                        with open(text_path, "w", encoding='utf-8') as f:
-                            f.write(cleaned_text)
-                        
-                        # Update student data
-                        st.session_state.student_data["motivation_letter_path"] = str(letter_path)
-                        st.session_state.student_data["motivation_letter_text"] = cleaned_text
-                        
-                        st.session_state.motivation_letter_uploaded = True
+                letter_status = st.empty()
+
+            # Every uploaded document not processed yet: (kind, file, status widget)
+            pending = [
+                (kind, uploaded, status)
+                for kind, uploaded, status, done in [
+                    ("cv", cv_file, cv_status, st.session_state.cv_uploaded),
+                    ("transcript", transcript_file, transcript_status, st.session_state.transcript_uploaded),
+                    ("motivation_letter", motivation_letter, letter_status, st.session_state.motivation_letter_uploaded),
+                ]
+                if uploaded and not done
+            ]
+            if pending:
+                self.ingest_documents(pending)
+
             # Proceed when both files are uploaded
             if st.session_state.cv_uploaded and st.session_state.transcript_uploaded:
                 combined_message = (
@@ -397,16 +583,19 @@ Please type 'confirm' to proceed with the matching process, or share any additio
         if prompt := st.chat_input("Your response"):
             # Add user message to chat history
             st.session_state.messages.append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
             
-            # Process user input and generate response
-            response = self.process_user_input(prompt)
+            # Process user input and stream the response as it is generated
+            with st.chat_message("assistant"):
+                response = st.write_stream(self.stream_user_input(prompt))
             
             # Add assistant response to chat history
             st.session_state.messages.append({"role": "assistant", "content": response})
             
             # Update conversation stage
             if st.session_state.conversation_stage != "completed":
-                stages = ["initial", "cv_uploaded", "interests_shared", "topics_shared", "skills_shared", "completed"]
+                stages = CONVERSATION_STAGES
                 current_index = stages.index(st.session_state.conversation_stage)
                 if current_index < len(stages) - 1:
                     st.session_state.conversation_stage = stages[current_index + 1]
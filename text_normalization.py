@@ -0,0 +1,58 @@
+import re
+from typing import Iterable, Iterator
+
+
+# A hyphen ending the line, then the continuation on a following line. The
+# pattern starts with a literal so the regex engine can skip ahead quickly.
+_HYPHENATED_BREAK = re.compile(r"-[ \t]*\r?\n\s*(?=[^\W\d_])")
+
+
+def _join_hyphenated(match: re.Match) -> str:
+    # Only join letter-/lowercase ("avail-\nable", not "data-\nDriven" or "3-\nx")
+    text, start, end = match.string, match.start(), match.end()
+    if start > 0 and text[start - 1].isalpha() and text[end].islower():
+        return ""
+    return match[0]
+
+
+def _separator(word: str) -> str:
+    """Paragraph break after a sentence end, a single space otherwise"""
+    return "\n\n" if word.endswith(".") else " "
+
+
+def _is_hyphenated(word: str, next_word: str) -> bool:
+    """True if word-/next_word is a word split across a page break"""
+    return len(word) > 1 and word.endswith("-") and word[-2].isalpha() and next_word[:1].islower()
+
+
+def normalize_pages(pages: Iterable[str]) -> Iterator[str]:
+    """
+    Normalize extracted PDF text page by page, yielding one chunk per page.
+
+    Whitespace runs collapse to single spaces, a sentence ending in '.' is
+    followed by a paragraph break, and words hyphenated across a line or page
+    break are joined. pages may be any iterable of strings, for example
+    PDFTextExtractor.iter_pages(); only one page is held in memory at a time.
+    """
+    pending = None  # last word of the previous page, held back until we know what follows it
+    for page in pages:
+        if "-" in page:
+            page = _HYPHENATED_BREAK.sub(_join_hyphenated, page)
+        words = page.split()
+        if not words:
+            continue
+        if pending is not None:
+            if _is_hyphenated(pending, words[0]):
+                words[0] = pending[:-1] + words[0]
+            else:
+                yield pending + _separator(pending)
+        if len(words) > 1:
+            # str.join/replace keep the per-word work in C
+            yield (" ".join(words[:-1]) + " ").replace(". ", ".\n\n")
+        pending = words[-1]
+    if pending is not None:
+        yield pending
+
+
+def normalize_text(text: str) -> str:
+    return "".join(normalize_pages([text]))
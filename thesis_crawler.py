@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from openai import OpenAI
+from llm_cache import LLMCache
+from llm_scheduler import BATCH, estimate_tokens, get_scheduler
+from page_store import Page, PageStore, normalize_url
+from prompts import get_chair_extraction_prompt
+
+
+# Keyword weights for links that are likely to lead to thesis topics (EN + DE)
+THESIS_KEYWORDS = {
+    "thesis": 10, "theses": 10, "abschlussarbeit": 10, "masterarbeit": 10,
+    "bachelorarbeit": 10, "master's thesis": 10, "bachelor's thesis": 10,
+    "open positions": 8, "offene stellen": 8, "open topics": 8, "offene themen": 8,
+    "student projects": 7, "studentische arbeiten": 7, "guided research": 7,
+    "idp": 5, "interdisciplinary project": 5, "topics": 4, "themen": 4,
+    "jobs": 4, "positions": 4, "stellen": 4, "hiwi": 4, "working student": 4,
+    "students": 3, "studierende": 3, "student": 3, "projects": 2, "projekte": 2,
+    "research": 2, "forschung": 2, "teaching": 1, "lehre": 1, "team": 1,
+}
+
+# Links that never contain thesis information
+IGNORED_KEYWORDS = (
+    "impressum", "imprint", "datenschutz", "privacy", "login", "logout",
+    "accessibility", "barrierefreiheit", "sitemap", "mailto:", "tel:", "javascript:",
+)
+IGNORED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".ics", ".doc", ".docx",
+    ".ppt", ".pptx",
+)
+
+
+def score_link(link_text: str, url: str) -> int:
+    """Heuristic relevance of a link for thesis discovery (0 = not relevant)"""
+    text = link_text.lower()
+    lowered_url = url.lower()
+    if any(word in text or word in lowered_url for word in IGNORED_KEYWORDS):
+        return 0
+    if urlsplit(lowered_url).path.endswith(IGNORED_EXTENSIONS):
+        return 0
+
+    score = 0
+    for keyword, weight in THESIS_KEYWORDS.items():
+        if keyword in text:
+            score += weight
+        # URL slugs use '-' or '_' instead of spaces
+        elif keyword.replace(" ", "-") in lowered_url or keyword.replace(" ", "_") in lowered_url:
+            score += weight // 2
+    return score
+
+
+class ThesisCrawler:
+    """
+    Deterministic replacement for the ReAct scraping agent.
+
+    Runs a bounded breadth-first crawl from the chair URL, follows only links
+    that the keyword classifier scores as relevant, fetches each level in
+    parallel and makes a single LLM call to extract the chair information and
+    thesis opportunities in the format parse_chair_data expects.
+    """
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        page_store: Optional[PageStore] = None,
+        max_depth: int = 2,
+        max_pages: int = 12,
+        max_links_per_page: int = 6,
+        min_link_score: int = 3,
+        max_workers: int = 6,
+        max_chars_per_page: int = 8000,
+        model: str = "gpt-4o",
+        cache: Optional[LLMCache] = None,
+    ):
+        self.client = OpenAI(api_key=openai_api_key)
+        self.page_store = page_store if page_store is not None else PageStore()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_links_per_page = max_links_per_page
+        self.min_link_score = min_link_score
+        self.max_workers = max_workers
+        self.max_chars_per_page = max_chars_per_page
+        self.model = model
+        self.cache = cache
+
+    def _fetch_all(self, urls: List[str]) -> List[Tuple[str, Optional[Page]]]:
+        """Fetch pages in parallel; failed pages come back as None"""
+        def fetch(url: str) -> Tuple[str, Optional[Page]]:
+            try:
+                return url, self.page_store.get(url)
+            except Exception as e:
+                print(f"Skipping {url}: {str(e)}")
+                return url, None
+
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(fetch, urls))
+
+    def _relevant_links(self, page: Page, root_host: str) -> List[Tuple[int, str]]:
+        """Score a page's links, keeping the best ones on the chair's host"""
+        scored = {}
+        for link_text, url in page.links:
+            if urlsplit(url).netloc.lower() != root_host:
+                continue
+            score = score_link(link_text, url)
+            if score >= self.min_link_score:
+                key = normalize_url(url)
+                scored[key] = max(score, scored.get(key, 0))
+        ranked = sorted(scored.items(), key=lambda item: item[1], reverse=True)
+        return [(score, url) for url, score in ranked[:self.max_links_per_page]]
+
+    def crawl(self, url: str) -> List[Page]:
+        """Bounded BFS from url; returns the home page followed by relevant pages"""
+        root_host = urlsplit(url).netloc.lower()
+        visited = {normalize_url(url)}
+        collected = []
+        frontier = [url]
+
+        for depth in range(self.max_depth + 1):
+            fetched = self._fetch_all(frontier)
+            candidates: Dict[str, int] = {}
+            for _, page in fetched:
+                if page is None:
+                    continue
+                collected.append(page)
+                if depth == self.max_depth:
+                    continue
+                for score, link in self._relevant_links(page, root_host):
+                    if link not in visited:
+                        candidates[link] = max(score, candidates.get(link, 0))
+
+            budget = self.max_pages - len(collected)
+            if budget <= 0 or not candidates:
+                break
+            frontier = [
+                link for link, _ in sorted(candidates.items(), key=lambda item: item[1], reverse=True)
+            ][:budget]
+            visited.update(frontier)
+
+        return collected[:self.max_pages]
+
+    def run(self, url: str) -> str:
+        """Crawl the chair website and extract its thesis opportunities"""
+        pages = self.crawl(url)
+        if not pages:
+            raise ValueError(f"Could not fetch any page from {url}")
+
+        prompt = get_chair_extraction_prompt(
+            url,
+            [(page.url, page.text[:self.max_chars_per_page]) for page in pages],
+        )
+        messages = [
+            {"role": "system", "content": "You are an expert at extracting thesis opportunities from university websites."},
+            {"role": "user", "content": prompt},
+        ]
+
+        def compute():
+            response = get_scheduler().call(
+                "openai",
+                self.model,
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    temperature=0,
+                    messages=messages,
+                ),
+                tokens=estimate_tokens(messages, max_output_tokens=2000),
+                priority=BATCH,
+            )
+            return response.choices[0].message.content
+
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(
+            self.cache.make_key("openai", self.model, messages, temperature=0), compute
+        )
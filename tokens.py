@@ -0,0 +1,23 @@
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Number of tokens in text; falls back to ~4 characters per token without tiktoken"""
+    if not text:
+        return 0
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+    return len(_encoding(model).encode(text))